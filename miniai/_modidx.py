@@ -8,6 +8,14 @@ d = { 'settings': { 'branch': 'main',
   'syms': { 'miniai.activations': { 'miniai.activations.ActivationStats': ('activations.html#activationstats', 'miniai/activations.py'),
                                     'miniai.activations.ActivationStats.__init__': ( 'activations.html#activationstats.__init__',
                                                                                      'miniai/activations.py'),
+                                    'miniai.activations.ActivationStats._hookfunc': ( 'activations.html#activationstats._hookfunc',
+                                                                                      'miniai/activations.py'),
+                                    'miniai.activations.ActivationStats._sync': ( 'activations.html#activationstats._sync',
+                                                                                  'miniai/activations.py'),
+                                    'miniai.activations.ActivationStats.after_batch': ( 'activations.html#activationstats.after_batch',
+                                                                                        'miniai/activations.py'),
+                                    'miniai.activations.ActivationStats.before_fit': ( 'activations.html#activationstats.before_fit',
+                                                                                       'miniai/activations.py'),
                                     'miniai.activations.ActivationStats.color_dim': ( 'activations.html#activationstats.color_dim',
                                                                                       'miniai/activations.py'),
                                     'miniai.activations.ActivationStats.dead_chart': ( 'activations.html#activationstats.dead_chart',
@@ -38,31 +46,94 @@ d = { 'settings': { 'branch': 'main',
                                                                                     'miniai/activations.py'),
                                     'miniai.activations.HooksCallback.before_fit': ( 'activations.html#hookscallback.before_fit',
                                                                                      'miniai/activations.py'),
+                                    'miniai.activations._stack': ('activations.html#_stack', 'miniai/activations.py'),
                                     'miniai.activations.append_stats': ('activations.html#append_stats', 'miniai/activations.py'),
+                                    'miniai.activations.buf_stats': ('activations.html#buf_stats', 'miniai/activations.py'),
+                                    'miniai.activations.device_stats': ('activations.html#device_stats', 'miniai/activations.py'),
                                     'miniai.activations.get_hist': ('activations.html#get_hist', 'miniai/activations.py'),
                                     'miniai.activations.get_min': ('activations.html#get_min', 'miniai/activations.py'),
                                     'miniai.activations.set_seed': ('activations.html#set_seed', 'miniai/activations.py')},
             'miniai.augment': { 'miniai.augment.CapturePreds': ('augment.html#capturepreds', 'miniai/augment.py'),
+                                'miniai.augment.CapturePreds.__init__': ('augment.html#capturepreds.__init__', 'miniai/augment.py'),
+                                'miniai.augment.CapturePreds._alloc': ('augment.html#capturepreds._alloc', 'miniai/augment.py'),
+                                'miniai.augment.CapturePreds._finish': ('augment.html#capturepreds._finish', 'miniai/augment.py'),
+                                'miniai.augment.CapturePreds._write': ('augment.html#capturepreds._write', 'miniai/augment.py'),
                                 'miniai.augment.CapturePreds.after_batch': ('augment.html#capturepreds.after_batch', 'miniai/augment.py'),
                                 'miniai.augment.CapturePreds.after_fit': ('augment.html#capturepreds.after_fit', 'miniai/augment.py'),
+                                'miniai.augment.CapturePreds.before_epoch': ('augment.html#capturepreds.before_epoch', 'miniai/augment.py'),
                                 'miniai.augment.CapturePreds.before_fit': ('augment.html#capturepreds.before_fit', 'miniai/augment.py'),
+                                'miniai.augment.InferenceEngine': ('augment.html#inferenceengine', 'miniai/augment.py'),
+                                'miniai.augment.InferenceEngine.__enter__': ('augment.html#inferenceengine.__enter__', 'miniai/augment.py'),
+                                'miniai.augment.InferenceEngine.__exit__': ('augment.html#inferenceengine.__exit__', 'miniai/augment.py'),
+                                'miniai.augment.InferenceEngine.__init__': ('augment.html#inferenceengine.__init__', 'miniai/augment.py'),
+                                'miniai.augment.InferenceEngine._loop': ('augment.html#inferenceengine._loop', 'miniai/augment.py'),
+                                'miniai.augment.InferenceEngine._next_batch': ( 'augment.html#inferenceengine._next_batch',
+                                                                                'miniai/augment.py'),
+                                'miniai.augment.InferenceEngine._run': ('augment.html#inferenceengine._run', 'miniai/augment.py'),
+                                'miniai.augment.InferenceEngine.apredict': ('augment.html#inferenceengine.apredict', 'miniai/augment.py'),
+                                'miniai.augment.InferenceEngine.close': ('augment.html#inferenceengine.close', 'miniai/augment.py'),
+                                'miniai.augment.InferenceEngine.map': ('augment.html#inferenceengine.map', 'miniai/augment.py'),
+                                'miniai.augment.InferenceEngine.predict': ('augment.html#inferenceengine.predict', 'miniai/augment.py'),
+                                'miniai.augment.InferenceEngine.stats': ('augment.html#inferenceengine.stats', 'miniai/augment.py'),
+                                'miniai.augment.InferenceEngine.submit': ('augment.html#inferenceengine.submit', 'miniai/augment.py'),
+                                'miniai.augment.ModelProfile': ('augment.html#modelprofile', 'miniai/augment.py'),
+                                'miniai.augment.ModelProfile.__init__': ('augment.html#modelprofile.__init__', 'miniai/augment.py'),
+                                'miniai.augment.ModelProfile.__repr__': ('augment.html#modelprofile.__repr__', 'miniai/augment.py'),
+                                'miniai.augment.ModelProfile._repr_markdown_': ( 'augment.html#modelprofile._repr_markdown_',
+                                                                                 'miniai/augment.py'),
+                                'miniai.augment.ModelProfile.table': ('augment.html#modelprofile.table', 'miniai/augment.py'),
+                                'miniai.augment.ModelProfile.to_json': ('augment.html#modelprofile.to_json', 'miniai/augment.py'),
+                                'miniai.augment.ModelProfile.totals': ('augment.html#modelprofile.totals', 'miniai/augment.py'),
+                                'miniai.augment.RandCopyBatch': ('augment.html#randcopybatch', 'miniai/augment.py'),
+                                'miniai.augment.RandCopyBatch.__init__': ('augment.html#randcopybatch.__init__', 'miniai/augment.py'),
+                                'miniai.augment.RandCopyBatch.forward': ('augment.html#randcopybatch.forward', 'miniai/augment.py'),
                                 'miniai.augment.RandErase': ('augment.html#randerase', 'miniai/augment.py'),
                                 'miniai.augment.RandErase.__init__': ('augment.html#randerase.__init__', 'miniai/augment.py'),
                                 'miniai.augment.RandErase.forward': ('augment.html#randerase.forward', 'miniai/augment.py'),
-                                'miniai.augment._flops': ('augment.html#_flops', 'miniai/augment.py'),
+                                'miniai.augment.RandEraseBatch': ('augment.html#randerasebatch', 'miniai/augment.py'),
+                                'miniai.augment.RandEraseBatch.__init__': ('augment.html#randerasebatch.__init__', 'miniai/augment.py'),
+                                'miniai.augment.RandEraseBatch.forward': ('augment.html#randerasebatch.forward', 'miniai/augment.py'),
+                                'miniai.augment._Request': ('augment.html#_request', 'miniai/augment.py'),
+                                'miniai.augment._Request.__init__': ('augment.html#_request.__init__', 'miniai/augment.py'),
+                                'miniai.augment._cost': ('augment.html#_cost', 'miniai/augment.py'),
+                                'miniai.augment._gather': ('augment.html#_gather', 'miniai/augment.py'),
+                                'miniai.augment._measure': ('augment.html#_measure', 'miniai/augment.py'),
+                                'miniai.augment._n_items': ('augment.html#_n_items', 'miniai/augment.py'),
+                                'miniai.augment._nbytes': ('augment.html#_nbytes', 'miniai/augment.py'),
                                 'miniai.augment._rand_copy1': ('augment.html#_rand_copy1', 'miniai/augment.py'),
                                 'miniai.augment._rand_erase1': ('augment.html#_rand_erase1', 'miniai/augment.py'),
+                                'miniai.augment._rand_rects': ('augment.html#_rand_rects', 'miniai/augment.py'),
+                                'miniai.augment._rand_starts': ('augment.html#_rand_starts', 'miniai/augment.py'),
+                                'miniai.augment._reduce': ('augment.html#_reduce', 'miniai/augment.py'),
+                                'miniai.augment._rows': ('augment.html#_rows', 'miniai/augment.py'),
+                                'miniai.augment._stats': ('augment.html#_stats', 'miniai/augment.py'),
                                 'miniai.augment.capture_preds': ('augment.html#capture_preds', 'miniai/augment.py'),
+                                'miniai.augment.inference_engine': ('augment.html#inference_engine', 'miniai/augment.py'),
+                                'miniai.augment.predict_batches': ('augment.html#predict_batches', 'miniai/augment.py'),
+                                'miniai.augment.profile_model': ('augment.html#profile_model', 'miniai/augment.py'),
                                 'miniai.augment.rand_copy': ('augment.html#rand_copy', 'miniai/augment.py'),
+                                'miniai.augment.rand_copy_batch': ('augment.html#rand_copy_batch', 'miniai/augment.py'),
                                 'miniai.augment.rand_erase': ('augment.html#rand_erase', 'miniai/augment.py'),
+                                'miniai.augment.rand_erase_batch': ('augment.html#rand_erase_batch', 'miniai/augment.py'),
                                 'miniai.augment.show_image_batch': ('augment.html#show_image_batch', 'miniai/augment.py'),
                                 'miniai.augment.summary': ('augment.html#summary', 'miniai/augment.py')},
-            'miniai.conv': { 'miniai.conv.collate_device': ('convolutions.html#collate_device', 'miniai/conv.py'),
+            'miniai.conv': { 'miniai.conv.PrefetchLoader': ('convolutions.html#prefetchloader', 'miniai/conv.py'),
+                             'miniai.conv.PrefetchLoader.__init__': ('convolutions.html#prefetchloader.__init__', 'miniai/conv.py'),
+                             'miniai.conv.PrefetchLoader.__iter__': ('convolutions.html#prefetchloader.__iter__', 'miniai/conv.py'),
+                             'miniai.conv.PrefetchLoader.__len__': ('convolutions.html#prefetchloader.__len__', 'miniai/conv.py'),
+                             'miniai.conv.PrefetchLoader._load': ('convolutions.html#prefetchloader._load', 'miniai/conv.py'),
+                             'miniai.conv._record_stream': ('convolutions.html#_record_stream', 'miniai/conv.py'),
+                             'miniai.conv.can_pin': ('convolutions.html#can_pin', 'miniai/conv.py'),
+                             'miniai.conv.collate_device': ('convolutions.html#collate_device', 'miniai/conv.py'),
                              'miniai.conv.conv': ('convolutions.html#conv', 'miniai/conv.py'),
+                             'miniai.conv.pin_memory': ('convolutions.html#pin_memory', 'miniai/conv.py'),
+                             'miniai.conv.prefetch': ('convolutions.html#prefetch', 'miniai/conv.py'),
                              'miniai.conv.to_device': ('convolutions.html#to_device', 'miniai/conv.py')},
             'miniai.datasets': { 'miniai.datasets.DataLoaders': ('datasets.html#dataloaders', 'miniai/datasets.py'),
                                  'miniai.datasets.DataLoaders.__init__': ('datasets.html#dataloaders.__init__', 'miniai/datasets.py'),
                                  'miniai.datasets.DataLoaders.from_dd': ('datasets.html#dataloaders.from_dd', 'miniai/datasets.py'),
+                                 'miniai.datasets._collate_tensors': ('datasets.html#_collate_tensors', 'miniai/datasets.py'),
+                                 'miniai.datasets.cache_ds': ('datasets.html#cache_ds', 'miniai/datasets.py'),
                                  'miniai.datasets.collate_dict': ('datasets.html#collate_dict', 'miniai/datasets.py'),
                                  'miniai.datasets.get_grid': ('datasets.html#get_grid', 'miniai/datasets.py'),
                                  'miniai.datasets.inplace': ('datasets.html#inplace', 'miniai/datasets.py'),
@@ -76,6 +147,29 @@ d = { 'settings': { 'branch': 'main',
                              'miniai.init.GeneralRelu': ('initializing.html#generalrelu', 'miniai/init.py'),
                              'miniai.init.GeneralRelu.__init__': ('initializing.html#generalrelu.__init__', 'miniai/init.py'),
                              'miniai.init.GeneralRelu.forward': ('initializing.html#generalrelu.forward', 'miniai/init.py'),
+                             'miniai.init.PipelineCB': ('initializing.html#pipelinecb', 'miniai/init.py'),
+                             'miniai.init.PipelineCB.__init__': ('initializing.html#pipelinecb.__init__', 'miniai/init.py'),
+                             'miniai.init.PipelineCB._add': ('initializing.html#pipelinecb._add', 'miniai/init.py'),
+                             'miniai.init.PipelineCB._cache': ('initializing.html#pipelinecb._cache', 'miniai/init.py'),
+                             'miniai.init.PipelineCB._where': ('initializing.html#pipelinecb._where', 'miniai/init.py'),
+                             'miniai.init.PipelineCB.before_batch': ('initializing.html#pipelinecb.before_batch', 'miniai/init.py'),
+                             'miniai.init.PipelineCB.before_fit': ('initializing.html#pipelinecb.before_fit', 'miniai/init.py'),
+                             'miniai.init.PipelineCB.cleanup_fit': ('initializing.html#pipelinecb.cleanup_fit', 'miniai/init.py'),
+                             'miniai.init.PipelineCB.stats': ('initializing.html#pipelinecb.stats', 'miniai/init.py'),
+                             'miniai.init.Stage': ('initializing.html#stage', 'miniai/init.py'),
+                             'miniai.init.Stage.__call__': ('initializing.html#stage.__call__', 'miniai/init.py'),
+                             'miniai.init.Stage.__init__': ('initializing.html#stage.__init__', 'miniai/init.py'),
+                             'miniai.init._StagedCollate': ('initializing.html#_stagedcollate', 'miniai/init.py'),
+                             'miniai.init._StagedCollate.__call__': ('initializing.html#_stagedcollate.__call__', 'miniai/init.py'),
+                             'miniai.init._StagedCollate.__init__': ('initializing.html#_stagedcollate.__init__', 'miniai/init.py'),
+                             'miniai.init._StagedLoader': ('initializing.html#_stagedloader', 'miniai/init.py'),
+                             'miniai.init._StagedLoader.__getattr__': ('initializing.html#_stagedloader.__getattr__', 'miniai/init.py'),
+                             'miniai.init._StagedLoader.__init__': ('initializing.html#_stagedloader.__init__', 'miniai/init.py'),
+                             'miniai.init._StagedLoader.__iter__': ('initializing.html#_stagedloader.__iter__', 'miniai/init.py'),
+                             'miniai.init._StagedLoader.__len__': ('initializing.html#_stagedloader.__len__', 'miniai/init.py'),
+                             'miniai.init._StagedLoader._gen': ('initializing.html#_stagedloader._gen', 'miniai/init.py'),
+                             'miniai.init._StagedLoader._prep': ('initializing.html#_stagedloader._prep', 'miniai/init.py'),
+                             'miniai.init._StagedLoader.rewrap': ('initializing.html#_stagedloader.rewrap', 'miniai/init.py'),
                              'miniai.init._lsuv_stats': ('initializing.html#_lsuv_stats', 'miniai/init.py'),
                              'miniai.init.clean_ipython_hist': ('initializing.html#clean_ipython_hist', 'miniai/init.py'),
                              'miniai.init.clean_mem': ('initializing.html#clean_mem', 'miniai/init.py'),
@@ -84,49 +178,128 @@ d = { 'settings': { 'branch': 'main',
                              'miniai.init.get_model': ('initializing.html#get_model', 'miniai/init.py'),
                              'miniai.init.init_weights': ('initializing.html#init_weights', 'miniai/init.py'),
                              'miniai.init.lsuv_init': ('initializing.html#lsuv_init', 'miniai/init.py'),
+                             'miniai.init.lsuv_model': ('initializing.html#lsuv_model', 'miniai/init.py'),
                              'miniai.init.plot_func': ('initializing.html#plot_func', 'miniai/init.py')},
-            'miniai.learner': { 'miniai.learner.Callback': ('learner.html#callback', 'miniai/learner.py'),
+            'miniai.learner': { 'miniai.learner.ASHACB': ('learner.html#ashacb', 'miniai/learner.py'),
+                                'miniai.learner.ASHACB.__init__': ('learner.html#ashacb.__init__', 'miniai/learner.py'),
+                                'miniai.learner.ASHACB._stop': ('learner.html#ashacb._stop', 'miniai/learner.py'),
+                                'miniai.learner.ASHACB.after_epoch': ('learner.html#ashacb.after_epoch', 'miniai/learner.py'),
+                                'miniai.learner.ASHACB.before_fit': ('learner.html#ashacb.before_fit', 'miniai/learner.py'),
+                                'miniai.learner.Callback': ('learner.html#callback', 'miniai/learner.py'),
                                 'miniai.learner.CancelBatchException': ('learner.html#cancelbatchexception', 'miniai/learner.py'),
                                 'miniai.learner.CancelEpochException': ('learner.html#cancelepochexception', 'miniai/learner.py'),
                                 'miniai.learner.CancelFitException': ('learner.html#cancelfitexception', 'miniai/learner.py'),
+                                'miniai.learner.CompileCB': ('learner.html#compilecb', 'miniai/learner.py'),
+                                'miniai.learner.CompileCB.__init__': ('learner.html#compilecb.__init__', 'miniai/learner.py'),
+                                'miniai.learner.CompileCB._compile': ('learner.html#compilecb._compile', 'miniai/learner.py'),
+                                'miniai.learner.CompileCB._fail': ('learner.html#compilecb._fail', 'miniai/learner.py'),
+                                'miniai.learner.CompileCB._first_loss': ('learner.html#compilecb._first_loss', 'miniai/learner.py'),
+                                'miniai.learner.CompileCB.after_loss': ('learner.html#compilecb.after_loss', 'miniai/learner.py'),
+                                'miniai.learner.CompileCB.before_batch': ('learner.html#compilecb.before_batch', 'miniai/learner.py'),
+                                'miniai.learner.CompileCB.before_fit': ('learner.html#compilecb.before_fit', 'miniai/learner.py'),
+                                'miniai.learner.CompileCB.cleanup_batch': ('learner.html#compilecb.cleanup_batch', 'miniai/learner.py'),
+                                'miniai.learner.CompileCB.cleanup_fit': ('learner.html#compilecb.cleanup_fit', 'miniai/learner.py'),
+                                'miniai.learner.DDPCB': ('learner.html#ddpcb', 'miniai/learner.py'),
+                                'miniai.learner.DDPCB.before_epoch': ('learner.html#ddpcb.before_epoch', 'miniai/learner.py'),
+                                'miniai.learner.DDPCB.before_fit': ('learner.html#ddpcb.before_fit', 'miniai/learner.py'),
+                                'miniai.learner.DDPCB.cleanup_fit': ('learner.html#ddpcb.cleanup_fit', 'miniai/learner.py'),
                                 'miniai.learner.DeviceCB': ('learner.html#devicecb', 'miniai/learner.py'),
                                 'miniai.learner.DeviceCB.__init__': ('learner.html#devicecb.__init__', 'miniai/learner.py'),
                                 'miniai.learner.DeviceCB.before_batch': ('learner.html#devicecb.before_batch', 'miniai/learner.py'),
+                                'miniai.learner.DeviceCB.before_epoch': ('learner.html#devicecb.before_epoch', 'miniai/learner.py'),
                                 'miniai.learner.DeviceCB.before_fit': ('learner.html#devicecb.before_fit', 'miniai/learner.py'),
+                                'miniai.learner.EarlyStoppingCB': ('learner.html#earlystoppingcb', 'miniai/learner.py'),
+                                'miniai.learner.EarlyStoppingCB.__init__': ('learner.html#earlystoppingcb.__init__', 'miniai/learner.py'),
+                                'miniai.learner.EarlyStoppingCB.after_epoch': ( 'learner.html#earlystoppingcb.after_epoch',
+                                                                                'miniai/learner.py'),
+                                'miniai.learner.EarlyStoppingCB.before_fit': ( 'learner.html#earlystoppingcb.before_fit',
+                                                                               'miniai/learner.py'),
+                                'miniai.learner.EarlyStoppingCB.best': ('learner.html#earlystoppingcb.best', 'miniai/learner.py'),
+                                'miniai.learner.EarlyStoppingCB.cleanup_fit': ( 'learner.html#earlystoppingcb.cleanup_fit',
+                                                                                'miniai/learner.py'),
                                 'miniai.learner.LRFinderCB': ('learner.html#lrfindercb', 'miniai/learner.py'),
                                 'miniai.learner.LRFinderCB.__init__': ('learner.html#lrfindercb.__init__', 'miniai/learner.py'),
+                                'miniai.learner.LRFinderCB._flush': ('learner.html#lrfindercb._flush', 'miniai/learner.py'),
                                 'miniai.learner.LRFinderCB.after_batch': ('learner.html#lrfindercb.after_batch', 'miniai/learner.py'),
+                                'miniai.learner.LRFinderCB.after_fit': ('learner.html#lrfindercb.after_fit', 'miniai/learner.py'),
                                 'miniai.learner.LRFinderCB.before_fit': ('learner.html#lrfindercb.before_fit', 'miniai/learner.py'),
                                 'miniai.learner.LRFinderCB.cleanup_fit': ('learner.html#lrfindercb.cleanup_fit', 'miniai/learner.py'),
                                 'miniai.learner.Learner': ('learner.html#learner', 'miniai/learner.py'),
                                 'miniai.learner.Learner.__getattr__': ('learner.html#learner.__getattr__', 'miniai/learner.py'),
                                 'miniai.learner.Learner.__init__': ('learner.html#learner.__init__', 'miniai/learner.py'),
+                                'miniai.learner.Learner._do_step': ('learner.html#learner._do_step', 'miniai/learner.py'),
                                 'miniai.learner.Learner._fit': ('learner.html#learner._fit', 'miniai/learner.py'),
+                                'miniai.learner.Learner._micro_batches': ('learner.html#learner._micro_batches', 'miniai/learner.py'),
                                 'miniai.learner.Learner._one_batch': ('learner.html#learner._one_batch', 'miniai/learner.py'),
                                 'miniai.learner.Learner._one_epoch': ('learner.html#learner._one_epoch', 'miniai/learner.py'),
+                                'miniai.learner.Learner._one_micro': ('learner.html#learner._one_micro', 'miniai/learner.py'),
                                 'miniai.learner.Learner.callback': ('learner.html#learner.callback', 'miniai/learner.py'),
                                 'miniai.learner.Learner.fit': ('learner.html#learner.fit', 'miniai/learner.py'),
                                 'miniai.learner.Learner.one_epoch': ('learner.html#learner.one_epoch', 'miniai/learner.py'),
                                 'miniai.learner.Learner.training': ('learner.html#learner.training', 'miniai/learner.py'),
+                                'miniai.learner.Learner.validate': ('learner.html#learner.validate', 'miniai/learner.py'),
                                 'miniai.learner.MetricsCB': ('learner.html#metricscb', 'miniai/learner.py'),
                                 'miniai.learner.MetricsCB.__init__': ('learner.html#metricscb.__init__', 'miniai/learner.py'),
+                                'miniai.learner.MetricsCB._compute': ('learner.html#metricscb._compute', 'miniai/learner.py'),
                                 'miniai.learner.MetricsCB._log': ('learner.html#metricscb._log', 'miniai/learner.py'),
+                                'miniai.learner.MetricsCB._to': ('learner.html#metricscb._to', 'miniai/learner.py'),
                                 'miniai.learner.MetricsCB.after_batch': ('learner.html#metricscb.after_batch', 'miniai/learner.py'),
                                 'miniai.learner.MetricsCB.after_epoch': ('learner.html#metricscb.after_epoch', 'miniai/learner.py'),
                                 'miniai.learner.MetricsCB.before_epoch': ('learner.html#metricscb.before_epoch', 'miniai/learner.py'),
                                 'miniai.learner.MetricsCB.before_fit': ('learner.html#metricscb.before_fit', 'miniai/learner.py'),
+                                'miniai.learner.MetricsCB.value': ('learner.html#metricscb.value', 'miniai/learner.py'),
+                                'miniai.learner.MixedPrecisionCB': ('learner.html#mixedprecisioncb', 'miniai/learner.py'),
+                                'miniai.learner.MixedPrecisionCB.__init__': ('learner.html#mixedprecisioncb.__init__', 'miniai/learner.py'),
+                                'miniai.learner.MixedPrecisionCB._exit': ('learner.html#mixedprecisioncb._exit', 'miniai/learner.py'),
+                                'miniai.learner.MixedPrecisionCB.after_backward': ( 'learner.html#mixedprecisioncb.after_backward',
+                                                                                    'miniai/learner.py'),
+                                'miniai.learner.MixedPrecisionCB.after_loss': ( 'learner.html#mixedprecisioncb.after_loss',
+                                                                                'miniai/learner.py'),
+                                'miniai.learner.MixedPrecisionCB.after_step': ( 'learner.html#mixedprecisioncb.after_step',
+                                                                                'miniai/learner.py'),
+                                'miniai.learner.MixedPrecisionCB.before_batch': ( 'learner.html#mixedprecisioncb.before_batch',
+                                                                                  'miniai/learner.py'),
+                                'miniai.learner.MixedPrecisionCB.before_fit': ( 'learner.html#mixedprecisioncb.before_fit',
+                                                                                'miniai/learner.py'),
+                                'miniai.learner.MixedPrecisionCB.before_step': ( 'learner.html#mixedprecisioncb.before_step',
+                                                                                 'miniai/learner.py'),
+                                'miniai.learner.MixedPrecisionCB.cleanup_batch': ( 'learner.html#mixedprecisioncb.cleanup_batch',
+                                                                                   'miniai/learner.py'),
                                 'miniai.learner.MomentumLearner': ('learner.html#momentumlearner', 'miniai/learner.py'),
                                 'miniai.learner.MomentumLearner.__init__': ('learner.html#momentumlearner.__init__', 'miniai/learner.py'),
                                 'miniai.learner.MomentumLearner.zero_grad': ('learner.html#momentumlearner.zero_grad', 'miniai/learner.py'),
                                 'miniai.learner.ProgressCB': ('learner.html#progresscb', 'miniai/learner.py'),
                                 'miniai.learner.ProgressCB.__init__': ('learner.html#progresscb.__init__', 'miniai/learner.py'),
+                                'miniai.learner.ProgressCB._add_loss': ('learner.html#progresscb._add_loss', 'miniai/learner.py'),
                                 'miniai.learner.ProgressCB._log': ('learner.html#progresscb._log', 'miniai/learner.py'),
+                                'miniai.learner.ProgressCB._plot': ('learner.html#progresscb._plot', 'miniai/learner.py'),
                                 'miniai.learner.ProgressCB.after_batch': ('learner.html#progresscb.after_batch', 'miniai/learner.py'),
                                 'miniai.learner.ProgressCB.after_epoch': ('learner.html#progresscb.after_epoch', 'miniai/learner.py'),
                                 'miniai.learner.ProgressCB.before_epoch': ('learner.html#progresscb.before_epoch', 'miniai/learner.py'),
                                 'miniai.learner.ProgressCB.before_fit': ('learner.html#progresscb.before_fit', 'miniai/learner.py'),
                                 'miniai.learner.SingleBatchCB': ('learner.html#singlebatchcb', 'miniai/learner.py'),
                                 'miniai.learner.SingleBatchCB.after_batch': ('learner.html#singlebatchcb.after_batch', 'miniai/learner.py'),
+                                'miniai.learner.SweepResults': ('learner.html#sweepresults', 'miniai/learner.py'),
+                                'miniai.learner.SweepResults.__getitem__': ('learner.html#sweepresults.__getitem__', 'miniai/learner.py'),
+                                'miniai.learner.SweepResults.__init__': ('learner.html#sweepresults.__init__', 'miniai/learner.py'),
+                                'miniai.learner.SweepResults.__len__': ('learner.html#sweepresults.__len__', 'miniai/learner.py'),
+                                'miniai.learner.SweepResults.__repr__': ('learner.html#sweepresults.__repr__', 'miniai/learner.py'),
+                                'miniai.learner.SweepResults._repr_markdown_': ( 'learner.html#sweepresults._repr_markdown_',
+                                                                                 'miniai/learner.py'),
+                                'miniai.learner.SweepResults.best': ('learner.html#sweepresults.best', 'miniai/learner.py'),
+                                'miniai.learner.SweepResults.table': ('learner.html#sweepresults.table', 'miniai/learner.py'),
+                                'miniai.learner.TraceCB': ('learner.html#tracecb', 'miniai/learner.py'),
+                                'miniai.learner.TraceCB.__init__': ('learner.html#tracecb.__init__', 'miniai/learner.py'),
+                                'miniai.learner.TraceCB.before_fit': ('learner.html#tracecb.before_fit', 'miniai/learner.py'),
+                                'miniai.learner.TraceCB.cleanup_fit': ('learner.html#tracecb.cleanup_fit', 'miniai/learner.py'),
+                                'miniai.learner.TraceCB.iter_dl': ('learner.html#tracecb.iter_dl', 'miniai/learner.py'),
+                                'miniai.learner.TraceCB.now': ('learner.html#tracecb.now', 'miniai/learner.py'),
+                                'miniai.learner.TraceCB.record': ('learner.html#tracecb.record', 'miniai/learner.py'),
+                                'miniai.learner.TraceCB.save': ('learner.html#tracecb.save', 'miniai/learner.py'),
+                                'miniai.learner.TraceCB.show': ('learner.html#tracecb.show', 'miniai/learner.py'),
+                                'miniai.learner.TraceCB.stats': ('learner.html#tracecb.stats', 'miniai/learner.py'),
+                                'miniai.learner.TraceCB.wrap': ('learner.html#tracecb.wrap', 'miniai/learner.py'),
+                                'miniai.learner.TraceCB.wrap_event': ('learner.html#tracecb.wrap_event', 'miniai/learner.py'),
                                 'miniai.learner.TrainCB': ('learner.html#traincb', 'miniai/learner.py'),
                                 'miniai.learner.TrainCB.__init__': ('learner.html#traincb.__init__', 'miniai/learner.py'),
                                 'miniai.learner.TrainCB.backward': ('learner.html#traincb.backward', 'miniai/learner.py'),
@@ -140,8 +313,40 @@ d = { 'settings': { 'branch': 'main',
                                 'miniai.learner.TrainLearner.predict': ('learner.html#trainlearner.predict', 'miniai/learner.py'),
                                 'miniai.learner.TrainLearner.step': ('learner.html#trainlearner.step', 'miniai/learner.py'),
                                 'miniai.learner.TrainLearner.zero_grad': ('learner.html#trainlearner.zero_grad', 'miniai/learner.py'),
+                                'miniai.learner.ValidateCB': ('learner.html#validatecb', 'miniai/learner.py'),
+                                'miniai.learner.ValidateCB.__init__': ('learner.html#validatecb.__init__', 'miniai/learner.py'),
+                                'miniai.learner.ValidateCB._validate': ('learner.html#validatecb._validate', 'miniai/learner.py'),
+                                'miniai.learner.ValidateCB.after_batch': ('learner.html#validatecb.after_batch', 'miniai/learner.py'),
+                                'miniai.learner.ValidateCB.before_fit': ('learner.html#validatecb.before_fit', 'miniai/learner.py'),
+                                'miniai.learner._FirstCall': ('learner.html#_firstcall', 'miniai/learner.py'),
+                                'miniai.learner._FirstCall.__init__': ('learner.html#_firstcall.__init__', 'miniai/learner.py'),
+                                'miniai.learner._FirstCall.forward': ('learner.html#_firstcall.forward', 'miniai/learner.py'),
+                                'miniai.learner._ShardSampler': ('learner.html#_shardsampler', 'miniai/learner.py'),
+                                'miniai.learner._ShardSampler.__init__': ('learner.html#_shardsampler.__init__', 'miniai/learner.py'),
+                                'miniai.learner._ShardSampler.__iter__': ('learner.html#_shardsampler.__iter__', 'miniai/learner.py'),
+                                'miniai.learner._ShardSampler.__len__': ('learner.html#_shardsampler.__len__', 'miniai/learner.py'),
+                                'miniai.learner._StrideLoader': ('learner.html#_strideloader', 'miniai/learner.py'),
+                                'miniai.learner._StrideLoader.__init__': ('learner.html#_strideloader.__init__', 'miniai/learner.py'),
+                                'miniai.learner._StrideLoader.__iter__': ('learner.html#_strideloader.__iter__', 'miniai/learner.py'),
+                                'miniai.learner._StrideLoader.__len__': ('learner.html#_strideloader.__len__', 'miniai/learner.py'),
+                                'miniai.learner._ddp_worker': ('learner.html#_ddp_worker', 'miniai/learner.py'),
+                                'miniai.learner._lr_sweep': ('learner.html#_lr_sweep', 'miniai/learner.py'),
+                                'miniai.learner._quiet': ('learner.html#_quiet', 'miniai/learner.py'),
+                                'miniai.learner._shard': ('learner.html#_shard', 'miniai/learner.py'),
+                                'miniai.learner._sweep_init': ('learner.html#_sweep_init', 'miniai/learner.py'),
+                                'miniai.learner._sweep_trial': ('learner.html#_sweep_trial', 'miniai/learner.py'),
+                                'miniai.learner._targets': ('learner.html#_targets', 'miniai/learner.py'),
+                                'miniai.learner.cb_methods': ('learner.html#cb_methods', 'miniai/learner.py'),
+                                'miniai.learner.fit_ddp': ('learner.html#fit_ddp', 'miniai/learner.py'),
                                 'miniai.learner.lr_find': ('learner.html#lr_find', 'miniai/learner.py'),
+                                'miniai.learner.lr_suggestions': ('learner.html#lr_suggestions', 'miniai/learner.py'),
                                 'miniai.learner.run_cbs': ('learner.html#run_cbs', 'miniai/learner.py'),
+                                'miniai.learner.run_sweep': ('learner.html#run_sweep', 'miniai/learner.py'),
+                                'miniai.learner.sample_space': ('learner.html#sample_space', 'miniai/learner.py'),
+                                'miniai.learner.share_dls': ('learner.html#share_dls', 'miniai/learner.py'),
+                                'miniai.learner.snapshot': ('learner.html#snapshot', 'miniai/learner.py'),
+                                'miniai.learner.stratified_idxs': ('learner.html#stratified_idxs', 'miniai/learner.py'),
+                                'miniai.learner.subset_dl': ('learner.html#subset_dl', 'miniai/learner.py'),
                                 'miniai.learner.to_cpu': ('learner.html#to_cpu', 'miniai/learner.py'),
                                 'miniai.learner.with_cbs': ('learner.html#with_cbs', 'miniai/learner.py'),
                                 'miniai.learner.with_cbs.__call__': ('learner.html#with_cbs.__call__', 'miniai/learner.py'),
@@ -155,22 +360,101 @@ d = { 'settings': { 'branch': 'main',
                             'miniai.sgd.BaseSchedCB._step': ('accel_sgd.html#baseschedcb._step', 'miniai/sgd.py'),
                             'miniai.sgd.BaseSchedCB.before_fit': ('accel_sgd.html#baseschedcb.before_fit', 'miniai/sgd.py'),
                             'miniai.sgd.BatchSchedCB': ('accel_sgd.html#batchschedcb', 'miniai/sgd.py'),
-                            'miniai.sgd.BatchSchedCB.after_batch': ('accel_sgd.html#batchschedcb.after_batch', 'miniai/sgd.py'),
+                            'miniai.sgd.BatchSchedCB.after_step': ('accel_sgd.html#batchschedcb.after_step', 'miniai/sgd.py'),
+                            'miniai.sgd.CheckpointCB': ('accel_sgd.html#checkpointcb', 'miniai/sgd.py'),
+                            'miniai.sgd.CheckpointCB.__init__': ('accel_sgd.html#checkpointcb.__init__', 'miniai/sgd.py'),
+                            'miniai.sgd.CheckpointCB._load': ('accel_sgd.html#checkpointcb._load', 'miniai/sgd.py'),
+                            'miniai.sgd.CheckpointCB._save': ('accel_sgd.html#checkpointcb._save', 'miniai/sgd.py'),
+                            'miniai.sgd.CheckpointCB._scheds': ('accel_sgd.html#checkpointcb._scheds', 'miniai/sgd.py'),
+                            'miniai.sgd.CheckpointCB._writer': ('accel_sgd.html#checkpointcb._writer', 'miniai/sgd.py'),
+                            'miniai.sgd.CheckpointCB.after_batch': ('accel_sgd.html#checkpointcb.after_batch', 'miniai/sgd.py'),
+                            'miniai.sgd.CheckpointCB.after_epoch': ('accel_sgd.html#checkpointcb.after_epoch', 'miniai/sgd.py'),
+                            'miniai.sgd.CheckpointCB.before_batch': ('accel_sgd.html#checkpointcb.before_batch', 'miniai/sgd.py'),
+                            'miniai.sgd.CheckpointCB.before_epoch': ('accel_sgd.html#checkpointcb.before_epoch', 'miniai/sgd.py'),
+                            'miniai.sgd.CheckpointCB.before_fit': ('accel_sgd.html#checkpointcb.before_fit', 'miniai/sgd.py'),
+                            'miniai.sgd.CheckpointCB.cleanup_fit': ('accel_sgd.html#checkpointcb.cleanup_fit', 'miniai/sgd.py'),
+                            'miniai.sgd.CheckpointCB.files': ('accel_sgd.html#checkpointcb.files', 'miniai/sgd.py'),
+                            'miniai.sgd.CheckpointCB.state': ('accel_sgd.html#checkpointcb.state', 'miniai/sgd.py'),
                             'miniai.sgd.EpochSchedStep': ('accel_sgd.html#epochschedstep', 'miniai/sgd.py'),
                             'miniai.sgd.EpochSchedStep.after_epoch': ('accel_sgd.html#epochschedstep.after_epoch', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatAdamW': ('accel_sgd.html#flatadamw', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatAdamW.__init__': ('accel_sgd.html#flatadamw.__init__', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatAdamW.init_state': ('accel_sgd.html#flatadamw.init_state', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatAdamW.update': ('accel_sgd.html#flatadamw.update', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatOptimizer': ('accel_sgd.html#flatoptimizer', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatOptimizer.__init__': ('accel_sgd.html#flatoptimizer.__init__', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatOptimizer._bucket': ('accel_sgd.html#flatoptimizer._bucket', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatOptimizer._build': ('accel_sgd.html#flatoptimizer._build', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatOptimizer._stale': ('accel_sgd.html#flatoptimizer._stale', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatOptimizer._units': ('accel_sgd.html#flatoptimizer._units', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatOptimizer.add_param_group': ('accel_sgd.html#flatoptimizer.add_param_group', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatOptimizer.init_state': ('accel_sgd.html#flatoptimizer.init_state', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatOptimizer.load_state_dict': ('accel_sgd.html#flatoptimizer.load_state_dict', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatOptimizer.step': ('accel_sgd.html#flatoptimizer.step', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatOptimizer.update': ('accel_sgd.html#flatoptimizer.update', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatOptimizer.zero_grad': ('accel_sgd.html#flatoptimizer.zero_grad', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatRMSProp': ('accel_sgd.html#flatrmsprop', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatRMSProp.__init__': ('accel_sgd.html#flatrmsprop.__init__', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatRMSProp.init_state': ('accel_sgd.html#flatrmsprop.init_state', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatRMSProp.update': ('accel_sgd.html#flatrmsprop.update', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatSGD': ('accel_sgd.html#flatsgd', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatSGD.__init__': ('accel_sgd.html#flatsgd.__init__', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatSGD.init_state': ('accel_sgd.html#flatsgd.init_state', 'miniai/sgd.py'),
+                            'miniai.sgd.FlatSGD.update': ('accel_sgd.html#flatsgd.update', 'miniai/sgd.py'),
                             'miniai.sgd.HasLearnCB': ('accel_sgd.html#haslearncb', 'miniai/sgd.py'),
                             'miniai.sgd.HasLearnCB.after_fit': ('accel_sgd.html#haslearncb.after_fit', 'miniai/sgd.py'),
                             'miniai.sgd.HasLearnCB.before_fit': ('accel_sgd.html#haslearncb.before_fit', 'miniai/sgd.py'),
+                            'miniai.sgd.PrecomputedSched': ('accel_sgd.html#precomputedsched', 'miniai/sgd.py'),
+                            'miniai.sgd.PrecomputedSched.__init__': ('accel_sgd.html#precomputedsched.__init__', 'miniai/sgd.py'),
+                            'miniai.sgd.PrecomputedSched._set': ('accel_sgd.html#precomputedsched._set', 'miniai/sgd.py'),
+                            'miniai.sgd.PrecomputedSched.load_state_dict': ( 'accel_sgd.html#precomputedsched.load_state_dict',
+                                                                             'miniai/sgd.py'),
+                            'miniai.sgd.PrecomputedSched.state_dict': ('accel_sgd.html#precomputedsched.state_dict', 'miniai/sgd.py'),
+                            'miniai.sgd.PrecomputedSched.step': ('accel_sgd.html#precomputedsched.step', 'miniai/sgd.py'),
                             'miniai.sgd.RecorderCB': ('accel_sgd.html#recordercb', 'miniai/sgd.py'),
                             'miniai.sgd.RecorderCB.__init__': ('accel_sgd.html#recordercb.__init__', 'miniai/sgd.py'),
-                            'miniai.sgd.RecorderCB.after_batch': ('accel_sgd.html#recordercb.after_batch', 'miniai/sgd.py'),
+                            'miniai.sgd.RecorderCB._alloc': ('accel_sgd.html#recordercb._alloc', 'miniai/sgd.py'),
+                            'miniai.sgd.RecorderCB._grow': ('accel_sgd.html#recordercb._grow', 'miniai/sgd.py'),
+                            'miniai.sgd.RecorderCB.before_batch': ('accel_sgd.html#recordercb.before_batch', 'miniai/sgd.py'),
                             'miniai.sgd.RecorderCB.before_fit': ('accel_sgd.html#recordercb.before_fit', 'miniai/sgd.py'),
-                            'miniai.sgd.RecorderCB.plot': ('accel_sgd.html#recordercb.plot', 'miniai/sgd.py')},
+                            'miniai.sgd.RecorderCB.before_step': ('accel_sgd.html#recordercb.before_step', 'miniai/sgd.py'),
+                            'miniai.sgd.RecorderCB.export': ('accel_sgd.html#recordercb.export', 'miniai/sgd.py'),
+                            'miniai.sgd.RecorderCB.plot': ('accel_sgd.html#recordercb.plot', 'miniai/sgd.py'),
+                            'miniai.sgd.RecorderCB.recs': ('accel_sgd.html#recordercb.recs', 'miniai/sgd.py'),
+                            'miniai.sgd.RecorderCB.steps': ('accel_sgd.html#recordercb.steps', 'miniai/sgd.py'),
+                            'miniai.sgd.SchedCB': ('accel_sgd.html#schedcb', 'miniai/sgd.py'),
+                            'miniai.sgd.SchedCB.__init__': ('accel_sgd.html#schedcb.__init__', 'miniai/sgd.py'),
+                            'miniai.sgd.SchedCB.before_fit': ('accel_sgd.html#schedcb.before_fit', 'miniai/sgd.py'),
+                            'miniai.sgd.SchedCB.plot': ('accel_sgd.html#schedcb.plot', 'miniai/sgd.py'),
+                            'miniai.sgd._cpu_copy': ('accel_sgd.html#_cpu_copy', 'miniai/sgd.py'),
+                            'miniai.sgd._decay': ('accel_sgd.html#_decay', 'miniai/sgd.py'),
+                            'miniai.sgd._downsample': ('accel_sgd.html#_downsample', 'miniai/sgd.py'),
+                            'miniai.sgd._get_pg': ('accel_sgd.html#_get_pg', 'miniai/sgd.py'),
+                            'miniai.sgd._pg_key': ('accel_sgd.html#_pg_key', 'miniai/sgd.py'),
+                            'miniai.sgd._rng_state': ('accel_sgd.html#_rng_state', 'miniai/sgd.py'),
+                            'miniai.sgd._set_pg': ('accel_sgd.html#_set_pg', 'miniai/sgd.py'),
+                            'miniai.sgd._set_rng_state': ('accel_sgd.html#_set_rng_state', 'miniai/sgd.py'),
+                            'miniai.sgd.combine_scheds': ('accel_sgd.html#combine_scheds', 'miniai/sgd.py'),
+                            'miniai.sgd.compile_scheds': ('accel_sgd.html#compile_scheds', 'miniai/sgd.py'),
+                            'miniai.sgd.one_cycle': ('accel_sgd.html#one_cycle', 'miniai/sgd.py'),
+                            'miniai.sgd.plot_scheds': ('accel_sgd.html#plot_scheds', 'miniai/sgd.py'),
+                            'miniai.sgd.sched_const': ('accel_sgd.html#sched_const', 'miniai/sgd.py'),
+                            'miniai.sgd.sched_cos': ('accel_sgd.html#sched_cos', 'miniai/sgd.py'),
+                            'miniai.sgd.sched_exp': ('accel_sgd.html#sched_exp', 'miniai/sgd.py'),
+                            'miniai.sgd.sched_lin': ('accel_sgd.html#sched_lin', 'miniai/sgd.py')},
             'miniai.training': { 'miniai.training.Dataset': ('minibatch_training.html#dataset', 'miniai/training.py'),
                                  'miniai.training.Dataset.__getitem__': ( 'minibatch_training.html#dataset.__getitem__',
                                                                           'miniai/training.py'),
                                  'miniai.training.Dataset.__init__': ('minibatch_training.html#dataset.__init__', 'miniai/training.py'),
                                  'miniai.training.Dataset.__len__': ('minibatch_training.html#dataset.__len__', 'miniai/training.py'),
+                                 'miniai.training.TensorLoader': ('minibatch_training.html#tensorloader', 'miniai/training.py'),
+                                 'miniai.training.TensorLoader.__init__': ( 'minibatch_training.html#tensorloader.__init__',
+                                                                            'miniai/training.py'),
+                                 'miniai.training.TensorLoader.__iter__': ( 'minibatch_training.html#tensorloader.__iter__',
+                                                                            'miniai/training.py'),
+                                 'miniai.training.TensorLoader.__len__': ( 'minibatch_training.html#tensorloader.__len__',
+                                                                           'miniai/training.py'),
+                                 'miniai.training._tensors': ('minibatch_training.html#_tensors', 'miniai/training.py'),
                                  'miniai.training.accuracy': ('minibatch_training.html#accuracy', 'miniai/training.py'),
                                  'miniai.training.fit': ('minibatch_training.html#fit', 'miniai/training.py'),
                                  'miniai.training.get_dls': ('minibatch_training.html#get_dls', 'miniai/training.py'),
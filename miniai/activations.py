@@ -10,7 +10,8 @@ from .datasets import *
 from .learner import *
 
 # %% auto 0
-__all__ = ['set_seed', 'Hook', 'Hooks', 'HooksCallback', 'append_stats', 'get_hist', 'get_min', 'ActivationStats']
+__all__ = ['set_seed', 'Hook', 'Hooks', 'HooksCallback', 'append_stats', 'get_hist', 'get_min', 'device_stats', 'buf_stats',
+           'ActivationStats']
 
 # %% ../nbs/10_activations.ipynb 6
 def set_seed(seed, determenistic=False):
@@ -109,24 +110,69 @@ def append_stats(hook, mod, inp, outp):
 
 # %% ../nbs/10_activations.ipynb 83
 # Thanks to @ste for initial version of histgram plotting code
+# stats are either lists of tensors (`append_stats`) or already stacked tensors (`buf_stats`)
+def _stack(o): return o if isinstance(o, torch.Tensor) else torch.stack(o)
 # stack stats together in a single tensor, transpose it, cast to float and log1p
-def get_hist(h): return torch.stack(h.stats[2]).t().float().log1p()
+def get_hist(h): return _stack(h.stats[2]).t().float().log1p()
 
 # %% ../nbs/10_activations.ipynb 88
 def get_min(h):
     # get transposed tensor as in `get_hist` without log1p
-    h1 = torch.stack(h.stats[2]).t().float()
+    h1 = _stack(h.stats[2]).t().float()
     # take ratio of the lowest bin (near zero) to all bins
     # do this for each batch
     return h1[0] / h1.sum(0)
 
-# %% ../nbs/10_activations.ipynb 93
+# %% ../nbs/10_activations.ipynb 92
+def device_stats(hook, mod, inp, outp, n=1000):
+    acts = outp.detach().float()
+    # create ring buffer on the first call: mean, std and 40 histogram bins per row
+    if not hasattr(hook, 'buf'): hook.buf, hook.n = torch.zeros(n, 42, device=acts.device), 0
+    std, mean = torch.std_mean(acts)
+    row = hook.buf[hook.n % len(hook.buf)]
+    row[:2] = torch.stack([mean, std])
+    row[2:] = acts.histc(40,0,10)
+    hook.n += 1
+
+def buf_stats(hook):
+    # copy buffer to cpu in one go, oldest sample first, and split it into the same stats as `append_stats`
+    b = hook.buf[:hook.n] if hook.n <= len(hook.buf) else hook.buf.roll(-(hook.n % len(hook.buf)), 0)
+    b = b.cpu()
+    return b[:,0], b[:,1], b[:,2:]
+
+# %% ../nbs/10_activations.ipynb 96
 class ActivationStats(HooksCallback):
-    # super init
-    def __init__(self, mod_filter=fc.noop): super().__init__(append_stats, mod_filter)
+    def __init__(self, 
+                 mod_filter=fc.noop, # function to filter modules to hook to
+                 every=1, # only collect stats every `every` training batches
+                 n=1000 # number of samples to keep for each layer
+                ):
+        super().__init__(partial(device_stats, n=n), mod_filter)
+        self.every = every
+    
+    
+    def before_fit(self, learn):
+        super().before_fit(learn)
+        self.i = 0
+        
+    
+    def _hookfunc(self, learn, *args, **kwargs):
+        # only sample every `every` batches
+        if self.i % self.every == 0: super()._hookfunc(learn, *args, **kwargs)
+    
+    
+    def after_batch(self, learn): 
+        if learn.training: self.i += 1
+    
+    
+    def _sync(self):
+        # bring stats from device ring buffers to `hook.stats`
+        for h in self:
+            if hasattr(h, 'buf'): h.stats = buf_stats(h)
     
     
     def color_dim(self, figsize=(11,5)):
+        self._sync()
         # grab grid based on length of stats
         fig, axes = get_grid(len(self), figsize=figsize)
         # plot colorful dims plots for each hook
@@ -135,6 +181,7 @@ class ActivationStats(HooksCallback):
       
     
     def dead_chart(self, figsize=(11,5)):
+        self._sync()
         # grab grid based on length of stats
         fig, axes = get_grid(len(self), figsize=figsize)
         # plot dead_chart, set ylimit
@@ -143,6 +190,7 @@ class ActivationStats(HooksCallback):
             ax.set_ylim(0,1)
     
     def plot_stats(self, figsize=(10,4)):
+        self._sync()
         # create subplots and plot means and std
         fig, axes = plt.subplots(1, 2, figsize=figsize)
         for h in self:
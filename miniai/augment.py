@@ -1,14 +1,20 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/14_augment.ipynb.
 
 # %% auto 0
-__all__ = ['summary', 'show_image_batch', 'CapturePreds', 'capture_preds', 'rand_erase', 'RandErase', 'rand_copy']
+__all__ = ['ModelProfile', 'profile_model', 'summary', 'show_image_batch', 'CapturePreds', 'capture_preds', 'InferenceEngine',
+           'inference_engine', 'predict_batches', 'rand_erase', 'RandErase', 'rand_copy', 'rand_erase_batch',
+           'rand_copy_batch', 'RandEraseBatch', 'RandCopyBatch']
 
 # %% ../nbs/14_augment.ipynb 3
-import torch,random
+import os,torch,random,math,time,json,itertools,threading,queue,asyncio,numpy as np
 import fastcore.all as fc
 
 from torch import nn
 from torch.nn import init
+from pathlib import Path
+from copy import deepcopy
+from collections import deque
+from concurrent.futures import Future
 
 from .datasets import *
 from .conv import *
@@ -18,61 +24,371 @@ from .init import *
 from .sgd import *
 from .resnet import *
 
-# %% ../nbs/14_augment.ipynb 20
-def _flops(x, h, w):
-    if x.dim()<3: return x.numel()
-    # i believe it assumes stride 1
-    if x.dim()==4: return x.numel()*h*w
+# %% ../nbs/14_augment.ipynb 22
+def _cost(m, inp, outp):
+    "MACs and FLOPs of leaf module `m` for input `inp` and output `outp`"
+    n = outp.numel()
+    if isinstance(m, nn.modules.conv._ConvNd):
+        # every output element is a dot product over (in_channels/groups) x kernel
+        macs = n * m.in_channels//m.groups * math.prod(m.kernel_size)
+        return macs, 2*macs + (n if m.bias is not None else 0)
+    if isinstance(m, nn.Linear):
+        macs = n * m.in_features
+        return macs, 2*macs + (n if m.bias is not None else 0)
+    if isinstance(m, (nn.modules.pooling._MaxPoolNd, nn.modules.pooling._AvgPoolNd)):
+        k = m.kernel_size
+        return 0, n * math.prod(k if isinstance(k, tuple) else (k,)*(outp.dim()-2))
+    if isinstance(m, (nn.modules.pooling._AdaptiveAvgPoolNd, nn.modules.pooling._AdaptiveMaxPoolNd)):
+        return 0, inp.numel()
+    if isinstance(m, (nn.modules.batchnorm._NormBase, nn.LayerNorm, nn.GroupNorm)):
+        # subtract mean and divide by std, plus scale and shift when affine
+        aff = getattr(m, 'affine', getattr(m, 'elementwise_affine', False))
+        return (n if aff else 0), (4 if aff else 2)*n
+    if not any(True for _ in m.children()): return 0, n
+    return 0, 0
 
+def _nbytes(t): return t.numel()*t.element_size()
+
+class ModelProfile:
+    "Per-module profile of a model, with `table` and `to_json` export"
+    def __init__(self, rows, shape, depth=1): fc.store_attr()
+    def totals(self):
+        return {k: sum(r[k] for r in self.rows) for k in ('params','param_bytes','act_bytes','macs','flops')}
+
+    def table(self):
+        cols = ['Module','Input','Output','Num params','Param MB','Act MB','MMACs','MFLOPs']
+        measured = any('fwd_ms' in r for r in self.rows)
+        if measured: cols += ['Fwd ms','Bwd ms','Peak MB']
+        res = '|' + '|'.join(cols) + '|\n|' + '--|'*len(cols) + '\n'
+        for r in self.rows:
+            # below the top level the same module type shows up in several places, so add its name
+            vals = [r['module'] if self.depth==1 else f"{r['name']} ({r['module']})", r['input'], r['output'], r['params'], f"{r['param_bytes']/2**20:.2f}",
+                    f"{r['act_bytes']/2**20:.2f}", f"{r['macs']/1e6:.1f}", f"{r['flops']/1e6:.1f}"]
+            if measured: vals += [f"{r['fwd_ms']:.2f}", f"{r['bwd_ms']:.2f}",
+                                  '-' if r['peak_bytes'] is None else f"{r['peak_bytes']/2**20:.1f}"]
+            res += '|' + '|'.join(map(str, vals)) + '|\n'
+        return res
+
+    def to_json(self, path=None):
+        res = json.dumps(dict(shape=self.shape, rows=self.rows, totals=self.totals()), indent=1)
+        if path is not None: Path(path).write_text(res)
+        return res
+
+    def _repr_markdown_(self): return self.table()
+    def __repr__(self): return self.table()
+
+def _rows(model, depth):
+    "named modules at `depth` (leaves above it are included too)"
+    res = []
+    def _walk(m, nm, d):
+        ch = list(m.named_children())
+        if d == depth or not ch: res.append((nm, m))
+        else:
+            for n,c in ch: _walk(c, f'{nm}.{n}' if nm else n, d+1)
+    _walk(model, '', 0)
+    return res
+
+def _measure(model, shape, rows, device):
+    "forward/backward wall time and peak memory of `rows` on a copy of `model`"
+    model = deepcopy(model).to(device)
+    mods = dict(model.named_modules())
+    cuda = torch.device(device).type == 'cuda'
+    def _now():
+        if cuda: torch.cuda.synchronize()
+        return time.perf_counter()
+    stats,hs = {},[]
+    for nm,_ in rows:
+        m, s = mods[nm], stats.setdefault(nm, dict(fwd=0., bwd=0., peak=None))
+        def _pre(mod, inp, s=s):
+            if cuda: torch.cuda.reset_peak_memory_stats()
+            s['t'] = _now()
+        def _post(mod, inp, outp, s=s):
+            s['fwd'] = _now()-s['t']
+            if cuda: s['peak'] = torch.cuda.max_memory_allocated()
+        def _bpre(mod, gout, s=s): s['tb'] = _now()
+        def _bpost(mod, gin, gout, s=s): s['bwd'] = _now()-s['tb']
+        hs += [m.register_forward_pre_hook(_pre), m.register_forward_hook(_post),
+               m.register_full_backward_pre_hook(_bpre), m.register_full_backward_hook(_bpost)]
+    try:
+        # first pass is a warmup
+        for _ in range(2):
+            x = torch.randn(shape, device=device, requires_grad=True)
+            model(x).float().sum().backward()
+    finally:
+        for h in hs: h.remove()
+    return stats
+
+def profile_model(model, shape, measured=False, depth=1, device=None):
+    "Profile `model` for input `shape` without running it on data or changing its weights"
+    rows = _rows(model, depth)
+    row_of = {m:i for i,(_,m) in enumerate(rows)}
+    res = [dict(module=type(m).__name__, name=nm, input=None, output=None, macs=0, flops=0, act_bytes=0,
+                params=sum(p.numel() for p in m.parameters()), param_bytes=sum(_nbytes(p) for p in m.parameters()))
+           for nm,m in rows]
+    # leaf costs get added to the row they belong to
+    owner = {}
+    for i,(_,m) in enumerate(rows):
+        for o in m.modules(): owner[o] = i
+    def _f(mod, inp, outp):
+        if not isinstance(outp, torch.Tensor): return
+        r = res[owner[mod]]
+        if not any(True for _ in mod.children()):
+            macs, flops = _cost(mod, inp[0], outp)
+            r['macs'] += macs
+            r['flops'] += flops
+        if mod in row_of:
+            r['input'], r['output'], r['act_bytes'] = tuple(inp[0].shape), tuple(outp.shape), _nbytes(outp)
+    hs = [o.register_forward_hook(_f) for o in model.modules() if o in owner]
+    try:
+        # replace parameters and buffers with meta tensors, so that nothing is computed or updated
+        meta = {k: torch.empty_like(v, device='meta') for k,v in itertools.chain(model.named_parameters(), model.named_buffers())}
+        with torch.no_grad(): torch.func.functional_call(model, meta, (torch.empty(shape, device='meta'),))
+    finally:
+        for h in hs: h.remove()
+    if measured:
+        if device is None: device = next(model.parameters()).device
+        stats = _measure(model, shape, rows, device)
+        for r in res:
+            s = stats[r['name']]
+            r['fwd_ms'], r['bwd_ms'], r['peak_bytes'] = s['fwd']*1e3, s['bwd']*1e3, s['peak']
+    return ModelProfile(res, tuple(shape), depth)
+
+# %% ../nbs/14_augment.ipynb 23
 @fc.patch
-def summary(self:Learner):
-    res = '|Module|Input|Output|Num params|MFLOPS|\n|--|--|--|--|--|\n'
-    totp,totf = 0,0
-    def _f(hook, mod, inp, outp):
-        nonlocal res,totp,totf
-        nparms = sum(o.numel() for o in mod.parameters())
-        totp += nparms
-        *_,h,w = outp.shape
-        flops = sum(_flops(o, h, w) for o in mod.parameters())/1e6
-        totf += flops
-        res += f'|{type(mod).__name__}|{tuple(inp[0].shape)}|{tuple(outp.shape)}|{nparms}|{flops:.1f}|\n'
-    with Hooks(self.model, _f) as hooks: self.fit(1, lr=1, cbs=SingleBatchCB())
-    print(f"Tot params: {totp}; MFLOPS: {totf:.1f}")
+def summary(self:Learner,
+            shape=None, # input shape; if None the shape of the first training batch is used
+            measured=False, # also measure forward and backward time and peak memory
+            depth=1 # module depth of the rows
+           ):
+    if shape is None: shape = next(iter(self.dls.train))[0].shape
+    prof = profile_model(self.model, shape, measured=measured, depth=depth)
+    tot = prof.totals()
+    print(f"Tot params: {tot['params']}; MFLOPS: {tot['flops']/1e6:.1f}")
     if fc.IN_NOTEBOOK:
         from IPython.display import Markdown
-        return Markdown(res)
-    else: print(res)
-     
+        return Markdown(prof.table())
+    else: print(prof.table())
 
-# %% ../nbs/14_augment.ipynb 41
+# %% ../nbs/14_augment.ipynb 46
 @fc.patch
 @fc.delegates(show_images)
 def show_image_batch(self:Learner, max_n=9, cbs=None, **kwargs):
     self.fit(1, cbs=[SingleBatchCB()] + fc.L(cbs))
     show_images(self.batch[0][:max_n], **kwargs)
 
-# %% ../nbs/14_augment.ipynb 49
+# %% ../nbs/14_augment.ipynb 54
+def _n_items(dl):
+    "number of items in (possibly wrapped) `dl`, or None if unknown"
+    while dl is not None:
+        if hasattr(dl, 'dataset'): return len(dl.dataset)
+        # `TensorLoader` keeps the tensors themselves
+        if hasattr(dl, 'ts'): return len(dl.ts[0])
+        # unwrap `progress_bar` and `PrefetchLoader`
+        dl = getattr(dl, 'gen', None) or getattr(dl, 'dl', None)
+
+def _reduce(preds, reduce):
+    if reduce is None: return preds
+    if reduce == 'argmax': return preds.argmax(-1)
+    if isinstance(reduce, int): return preds.topk(reduce, dim=-1).indices
+    return reduce(preds)
+
 class CapturePreds(Callback):
-    def before_fit(self, learn): self.all_inps, self.all_preds, self.all_targs = [], [], []
-    
+    def __init__(self,
+                 inps=False, # also capture inputs
+                 reduce=None, # None (full preds), 'argmax', `k` (top-k class indices) or a function of preds
+                 losses=False, # capture per-sample losses (`loss_func` must accept `reduction='none'`)
+                 path=None, # stream everything to `.npy` memory-mapped files in `path` instead of RAM
+                 n=None # number of samples, if it can't be found from `len(dl.dataset)`
+                ): fc.store_attr()
+
+    def before_fit(self, learn):
+        self.bufs, self.mms, self.i = {}, {}, 0
+        if self.path is not None: Path(self.path).mkdir(parents=True, exist_ok=True)
+
+    @torch.inference_mode(False)
+    def _alloc(self, nm, t, n):
+        # buffers are allocated on the first batch, with the shape and dtype of a sample
+        # (outside of the inference mode of `Learner.validate`, so that the outputs can be modified in place)
+        shape, dt = (n,*t.shape[1:]), torch.float32 if t.dtype == torch.bfloat16 else t.dtype
+        if self.path is None: return torch.empty(shape, dtype=dt)
+        npdt = torch.empty(0, dtype=dt).numpy().dtype
+        # a grown buffer gets a new file, as the old one is still mapped while it's copied
+        fn = Path(self.path)/(f'{nm}.npy' if nm not in self.mms else f'{nm}.{n}.npy')
+        mm = self.mms[nm] = np.lib.format.open_memmap(fn, mode='w+', dtype=npdt, shape=shape)
+        return torch.from_numpy(mm)
+
+    def _write(self, nm, t):
+        t = to_cpu(t.detach())
+        buf = self.bufs.get(nm)
+        if buf is None:
+            n = self.n or _n_items(self.dl)
+            if n is None and self.path is not None: raise ValueError("pass `n` to stream preds of a dataloader without a dataset")
+            buf = self.bufs[nm] = self._alloc(nm, t, n or len(t))
+        if self.i+len(t) > len(buf):
+            # unknown (or too small) size: grow by doubling
+            old = self.mms.get(nm)
+            new = self._alloc(nm, t, max(2*len(buf), self.i+len(t)))
+            new[:self.i] = buf[:self.i]
+            buf = self.bufs[nm] = new
+            # unmap the old file before removing it
+            if old is not None:
+                fn = old.filename
+                del old
+                os.remove(fn)
+        buf[self.i:self.i+len(t)] = t
+
+    def before_epoch(self, learn): self.dl = learn.dl
+
     def after_batch(self, learn):
-        self.all_inps.append(to_cpu(learn.batch[0]))
-        self.all_preds.append(to_cpu(learn.preds))
-        self.all_targs.append(to_cpu(learn.batch[1]))
-    
+        x, y = learn.batch[:2]
+        # reduce on device, so that only what we keep gets copied to cpu
+        with torch.no_grad():
+            self._write('preds', _reduce(learn.preds, self.reduce))
+            self._write('targs', y)
+            if self.inps: self._write('inps', x)
+            if self.losses: self._write('losses', learn.loss_func(learn.preds, y, reduction='none'))
+        self.i += len(y)
+
+    def _finish(self, nm):
+        # flush a memory-mapped file to disk, grown buffers are written to the final file name
+        mm, fn = self.mms.pop(nm), Path(self.path)/f'{nm}.npy'
+        mm.flush()
+        if Path(mm.filename) == fn: return
+        # copy the filled part of a grown buffer to the final file
+        out = np.lib.format.open_memmap(fn, mode='w+', dtype=mm.dtype, shape=(self.i,*mm.shape[1:]))
+        out[:] = mm[:self.i]
+        out.flush()
+        old, self.bufs[nm] = mm.filename, torch.from_numpy(out)
+        del mm
+        os.remove(old)
+
     def after_fit(self, learn):
-        self.all_preds,self.all_targs,self.all_inps = map(torch.cat, [self.all_preds,self.all_targs,self.all_inps])
+        for nm in list(self.mms): self._finish(nm)
+        for nm,buf in self.bufs.items():
+            setattr(self, f'all_{nm}', buf[:self.i])
 
-# %% ../nbs/14_augment.ipynb 50
+# %% ../nbs/14_augment.ipynb 56
 @fc.patch
-def capture_preds(self: Learner, cbs=None, inps=False):
-    cp = CapturePreds()
+def capture_preds(self: Learner, cbs=None, inps=False, reduce=None, losses=False, path=None, n=None):
+    cp = CapturePreds(inps=inps, reduce=reduce, losses=losses, path=path, n=n)
     self.fit(1, train=False, cbs=[cp]+fc.L(cbs))
     res = cp.all_preds, cp.all_targs
     if inps: res = res + (cp.all_inps,)
+    if losses: res = res + (cp.all_losses,)
     return res
 
-# %% ../nbs/14_augment.ipynb 70
+# %% ../nbs/14_augment.ipynb 67
+class _Request:
+    __slots__ = ('x', 'fut', 't')
+    def __init__(self, x): self.x, self.fut, self.t = x, Future(), time.perf_counter()
+
+class InferenceEngine:
+    "Thread-safe dynamic batching of single samples for `model`"
+    def __init__(self, model, 
+                 max_bs=64, # max number of samples in a batch
+                 max_wait=5e-3, # max seconds the first sample of a batch waits for more samples
+                 device=None, # device to move the model to and run on (default: the one the model is on)
+                 n_lat=100_000 # number of most recent latencies kept for `stats`
+                ):
+        fc.store_attr('model,max_bs,max_wait')
+        self.device = device or next(model.parameters()).device
+        self.training = model.training
+        model.to(self.device).eval()
+        # latencies of the last `n_lat` requests, and number of batches of each size
+        self.lat, self.n_req, self.bs_counts = np.zeros(n_lat), 0, np.zeros(max_bs+1, dtype=np.int64)
+        self.q = queue.SimpleQueue()
+        # `closed` is set under `lock`, so that no request gets queued after the thread has been stopped
+        self.lock, self.closed = threading.Lock(), False
+        self.th = threading.Thread(target=self._loop, daemon=True)
+        self.th.start()
+
+    def submit(self, x):
+        "Queue sample `x`, returning a `Future` of its prediction"
+        r = _Request(x)
+        with self.lock:
+            if self.closed: raise RuntimeError("can't submit to a closed InferenceEngine")
+            self.q.put(r)
+        return r.fut
+
+    def predict(self, x): return self.submit(x).result()
+    async def apredict(self, x): return await asyncio.wrap_future(self.submit(x))
+
+    def map(self, xs, window=None):
+        "Predictions for the samples of `xs` (any iterable), in order, keeping at most `window` of them in flight"
+        window = window or 4*self.max_bs
+        futs = deque()
+        for x in xs:
+            futs.append(self.submit(x))
+            if len(futs) >= window: yield futs.popleft().result()
+        while futs: yield futs.popleft().result()
+
+    def _next_batch(self):
+        # wait for a first request, then fill the batch until it's full or its deadline has passed
+        r = self.q.get()
+        if r is None: return None
+        batch, deadline = [r], r.t+self.max_wait
+        while len(batch) < self.max_bs:
+            try: r = self.q.get(timeout=max(deadline-time.perf_counter(), 0))
+            except queue.Empty: break
+            if r is None:
+                self.q.put(None)
+                break
+            batch.append(r)
+        return batch
+
+    def _run(self, batch):
+        try:
+            with torch.inference_mode():
+                preds = self.model(torch.stack([r.x for r in batch]).to(self.device)).cpu()
+        except Exception as e:
+            for r in batch: r.fut.set_exception(e)
+            return
+        t = time.perf_counter()
+        for r,p in zip(batch, preds):
+            self.lat[self.n_req % len(self.lat)] = t-r.t
+            self.n_req += 1
+            r.fut.set_result(p)
+        self.bs_counts[len(batch)] += 1
+
+    def _loop(self):
+        while (batch := self._next_batch()) is not None: self._run(batch)
+
+    def stats(self, pcts=(50, 90, 99)):
+        "Latency percentiles (ms), number of requests and batches, and mean batch fill"
+        lat = self.lat[:min(self.n_req, len(self.lat))]*1000
+        res = {f'p{p}_ms': float(np.percentile(lat, p)) if len(lat) else None for p in pcts}
+        n = int(self.bs_counts.sum())
+        mean_bs = float(self.bs_counts @ np.arange(self.max_bs+1))/n if n else None
+        return dict(**res, requests=self.n_req, batches=n, mean_bs=mean_bs, fill=mean_bs and mean_bs/self.max_bs)
+
+    def close(self):
+        "Finish the queued requests, stop the thread and put the model back in its previous mode"
+        with self.lock:
+            if self.closed: return
+            self.closed = True
+            self.q.put(None)
+        self.th.join()
+        self.model.train(self.training)
+
+    def __enter__(self): return self
+    def __exit__(self, *args): self.close()
+
+# %% ../nbs/14_augment.ipynb 68
+@fc.patch
+def inference_engine(self: Learner, max_bs=64, max_wait=5e-3, device=None):
+    "An `InferenceEngine` for `self.model`"
+    return InferenceEngine(self.model, max_bs=max_bs, max_wait=max_wait, device=device)
+
+@fc.patch
+def predict_batches(self: Learner, 
+                    xs, # iterable of samples (e.g. a dataset's inputs, or a stream)
+                    max_bs=64, max_wait=5e-3, device=None):
+    "Predictions for the samples of `xs` stacked in order, with dynamic batching"
+    with self.inference_engine(max_bs, max_wait, device) as eng: preds = list(eng.map(xs))
+    if not preds: raise ValueError('`xs` has no samples to predict')
+    return torch.stack(preds)
+
+# %% ../nbs/14_augment.ipynb 89
 def _rand_erase1(x, pct, xm, xs, mn, mx):
     szx = int(pct * x.shape[-2])
     szy = int(pct * x.shape[-1])
@@ -83,14 +399,14 @@ def _rand_erase1(x, pct, xm, xs, mn, mx):
     # clamp to keep min and max the same
     x.clamp_(mn, mx)
 
-# %% ../nbs/14_augment.ipynb 73
+# %% ../nbs/14_augment.ipynb 92
 def rand_erase(x, pct=0.2, max_num = 4):
     xm,xs,mn,mx = x.mean(),x.std(),x.min(),x.max()
     num = random.randint(0, max_num)
     for i in range(num): _rand_erase1(x, pct, xm, xs, mn, mx)
     return x
 
-# %% ../nbs/14_augment.ipynb 76
+# %% ../nbs/14_augment.ipynb 95
 class RandErase(nn.Module):
     def __init__(self, pct=0.2, max_num=4):
         super().__init__()
@@ -98,7 +414,7 @@ class RandErase(nn.Module):
         
     def forward(self, x): return rand_erase(x, self.pct, self.max_num)
 
-# %% ../nbs/14_augment.ipynb 86
+# %% ../nbs/14_augment.ipynb 105
 def _rand_copy1(x, pct):
     szx = int(pct*x.shape[-2])
     szy = int(pct*x.shape[-1])
@@ -108,9 +424,86 @@ def _rand_copy1(x, pct):
     sty2 = int(random.random()*(1-pct)*x.shape[-1])
     x[:,:,stx1:stx1+szx,sty1:sty1+szy] = x[:,:,stx2:stx2+szx,sty2:sty2+szy]
 
-# %% ../nbs/14_augment.ipynb 88
+# %% ../nbs/14_augment.ipynb 107
 def rand_copy(x, pct=0.2, max_num = 4):
     num = random.randint(0, max_num)
     for i in range(num): _rand_copy1(x, pct)
 #     print(num)
     return x
+
+# %% ../nbs/14_augment.ipynb 114
+def _rand_starts(x, pct, max_num):
+    "random starting points `(n,max_num)` of rectangles of `pct` of height and width"
+    n, (h, w) = len(x), x.shape[-2:]
+    stx = (torch.rand(n, max_num, device=x.device)*(1-pct)*h).long()
+    sty = (torch.rand(n, max_num, device=x.device)*(1-pct)*w).long()
+    return stx, sty
+
+def _rand_rects(x, pct, max_num):
+    "for each pixel: whether it's in one of up to `max_num` random rectangles of its sample, and in which one"
+    n, (h, w), dev = len(x), x.shape[-2:], x.device
+    szx, szy = int(pct*h), int(pct*w)
+    stx, sty = _rand_starts(x, pct, max_num)
+    # how many of the `max_num` rectangles each sample actually uses
+    used = torch.arange(max_num, device=dev) < torch.randint(0, max_num+1, (n,1), device=dev)
+    # flat index of every pixel of every rectangle, `(n, max_num*szx*szy)`
+    rows, cols = stx[...,None]+torch.arange(szx, device=dev), sty[...,None]+torch.arange(szy, device=dev)
+    idx = (rows[...,None]*w + cols[...,None,:]).flatten(1)
+    # rectangle `r` writes `r+1` (unused ones write 0) to its pixels, keeping the max: so the last rectangle covering
+    # a pixel wins, as in the loop versions. A single integer scatter paints all of them at once
+    v = ((torch.arange(max_num, device=dev)+1)*used)[...,None].expand(-1,-1,szx*szy).flatten(1)
+    s = torch.zeros(n, h*w, dtype=torch.long, device=dev).scatter_reduce_(1, idx, v, 'amax')
+    return s > 0, (s-1).clamp(min=0), stx, sty
+
+def _stats(x):
+    "per-sample mean, std, min and max"
+    xf = x.flatten(1)
+    xm, x2 = xf.mean(1), (xf*xf).mean(1)
+    xs = ((x2 - xm*xm).clamp(min=0) * xf.shape[1]/(xf.shape[1]-1)).sqrt()
+    return xm, xs, xf.amin(1), xf.amax(1)
+
+def _gather(src, cov, r, off, base):
+    "pixels of `src` at `base` plus the offset `off` of the covering rectangle `r`, and 0 for uncovered pixels"
+    idx = off.gather(1, r).add_(base).masked_fill_(~cov, 0)
+    return src.gather(2, idx[:,None].expand(-1,src.shape[1],-1))
+
+def rand_erase_batch(x, pct=0.2, max_num=4):
+    "replace up to `max_num` random rectangles of each sample with noise matching the sample's stats"
+    n, c, h, w = x.shape
+    szx, szy = int(pct*h), int(pct*w)
+    # rectangles with no pixels (e.g. `pct*h < 1`) erase nothing
+    if max_num == 0 or szx*szy == 0: return x
+    cov, r, stx, sty = _rand_rects(x, pct, max_num)
+    # noise is only drawn for the rectangles, with each sample's own mean and std, and clamped to its range
+    xm, xs, mn, mx = [o[:,None,None] for o in _stats(x)]
+    noise = torch.randn(n, c, max_num*szx*szy, device=x.device, dtype=x.dtype).mul_(xs).add_(xm).clamp_(mn, mx)
+    # pixel (i,j) of rectangle `r` reads noise[r*szx*szy + (i-stx)*szy + (j-sty)]
+    rows, cols = torch.arange(h, device=x.device), torch.arange(w, device=x.device)
+    off = torch.arange(max_num, device=x.device)*szx*szy - stx*szy - sty
+    res = _gather(noise, cov, r, off, (rows[:,None]*szy + cols).flatten())
+    return torch.where(cov.view(n,1,h,w), res.view_as(x), x)
+
+def rand_copy_batch(x, pct=0.2, max_num=4):
+    "copy up to `max_num` random rectangles of each sample from another random place of the same sample"
+    n, c, h, w = x.shape
+    if max_num == 0 or int(pct*h)*int(pct*w) == 0: return x
+    cov, r, stx, sty = _rand_rects(x, pct, max_num)
+    srcx, srcy = _rand_starts(x, pct, max_num)
+    # covered pixels read from the same position in their rectangle's source, the others read themselves
+    off = (srcx-stx)*w + (srcy-sty)
+    res = _gather(x.flatten(2), cov, r, off, torch.arange(h*w, device=x.device))
+    return torch.where(cov.view(n,1,h,w), res.view_as(x), x)
+
+class RandEraseBatch(nn.Module):
+    def __init__(self, pct=0.2, max_num=4):
+        super().__init__()
+        self.pct, self.max_num = pct, max_num
+
+    def forward(self, x): return rand_erase_batch(x, self.pct, self.max_num)
+
+class RandCopyBatch(nn.Module):
+    def __init__(self, pct=0.2, max_num=4):
+        super().__init__()
+        self.pct, self.max_num = pct, max_num
+
+    def forward(self, x): return rand_copy_batch(x, self.pct, self.max_num)
@@ -1,10 +1,11 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/07_convolutions.ipynb.
 
 # %% auto 0
-__all__ = ['def_device', 'conv', 'to_device', 'collate_device']
+__all__ = ['def_device', 'conv', 'to_device', 'can_pin', 'pin_memory', 'collate_device', 'PrefetchLoader', 'prefetch']
 
 # %% ../nbs/07_convolutions.ipynb 2
-import torch
+import time, queue, threading, torch
+import fastcore.all as fc
 from torch import nn
 
 from torch.utils.data import default_collate
@@ -24,12 +25,93 @@ def conv(ni, nf, ks=3, stride=2, act=True):
 # %% ../nbs/07_convolutions.ipynb 85
 def_device = 'mps' if torch.backends.mps.is_available() else 'cuda' if torch.cuda.is_available() else 'cpu'
 
-def to_device(x, device=def_device):
-    # if tensor -> move it to device
-    if isinstance(x, torch.Tensor): return x.to(device)
+def to_device(x, device=def_device, non_blocking=False):
+    # if tensor -> move it to device (`non_blocking` copies are asynchronous if `x` is in pinned memory)
+    if isinstance(x, torch.Tensor): return x.to(device, non_blocking=non_blocking)
     # if Mapping -> move each value to a device
-    if isinstance(x, Mapping): return {k:v.to(device) for k,v in x.items()}
+    if isinstance(x, Mapping): return {k:v.to(device, non_blocking=non_blocking) for k,v in x.items()}
     # if not tensor or Mapping -> move each of its element to a device and cast to a relevant type
-    return type(x)(to_device(o, device) for o in x)
+    return type(x)(to_device(o, device, non_blocking) for o in x)
 
-def collate_device(b): return to_device(default_collate(b))
+def can_pin(device=def_device): return torch.device(device).type == 'cuda'
+
+def pin_memory(x):
+    # page-locked (pinned) memory lets host-to-device copies run asynchronously
+    if isinstance(x, torch.Tensor): return x.pin_memory()
+    if isinstance(x, Mapping): return {k:v.pin_memory() for k,v in x.items()}
+    return type(x)(pin_memory(o) for o in x)
+
+def collate_device(b, device=def_device, pin=False):
+    b = default_collate(b)
+    # pin the collated batch and copy it without blocking when an accelerator is present
+    if pin and can_pin(device): return to_device(pin_memory(b), device, non_blocking=True)
+    return to_device(b, device)
+
+# %% ../nbs/07_convolutions.ipynb 108
+class PrefetchLoader:
+    def __init__(self,
+                 dl, # dataloader to wrap
+                 device=def_device, # device to move batches to
+                 n=2, # number of batches to prepare ahead
+                 pin=None # pin batches before copying, defaults to True for cuda
+                ):
+        self.dl, self.device, self.n = dl, device, n
+        self.pin = can_pin(device) if pin is None else pin
+        self.stats = {}
+
+    def __len__(self): return len(self.dl)
+
+    def _load(self, q, stop):
+        # runs on a background thread: load batches, move them to device and put them in `q` until `stop` is set
+        stream = torch.cuda.Stream() if self.pin else None
+        try:
+            for b in self.dl:
+                if self.pin:
+                    with torch.cuda.stream(stream):
+                        b = to_device(pin_memory(b), self.device, non_blocking=True)
+                        ev = torch.cuda.Event()
+                        ev.record(stream)
+                else: b, ev = to_device(b, self.device), None
+                while not stop.is_set():
+                    try: q.put((b, ev), timeout=0.1); break
+                    except queue.Full: pass
+                if stop.is_set(): return
+        except Exception as e: q.put((e, None))
+        q.put((StopIteration(), None))
+
+    def __iter__(self):
+        q, stop = queue.Queue(self.n), threading.Event()
+        self.stats = dict(batches=0, stall=0., depth=0.)
+        t = threading.Thread(target=self._load, args=(q, stop), daemon=True)
+        t.start()
+        try:
+            while True:
+                depth, start = q.qsize(), time.perf_counter()
+                b, ev = q.get()
+                self.stats['stall'] += time.perf_counter() - start
+                if isinstance(b, StopIteration): break
+                if isinstance(b, Exception): raise b
+                # make the current stream wait for the copy, and stop the allocator reusing the batch memory too early
+                if ev is not None:
+                    ev.wait()
+                    _record_stream(b)
+                n = self.stats['batches'] = self.stats['batches'] + 1
+                self.stats['depth'] += (depth - self.stats['depth']) / n
+                yield b
+        finally:
+            # stop the loader thread if iteration ended early (e.g. `CancelEpochException`)
+            stop.set()
+            while t.is_alive():
+                try: q.get(timeout=0.1)
+                except queue.Empty: pass
+
+def _record_stream(x):
+    if isinstance(x, torch.Tensor): x.record_stream(torch.cuda.current_stream())
+    elif isinstance(x, Mapping): [_record_stream(o) for o in x.values()]
+    else: [_record_stream(o) for o in x]
+
+# %% ../nbs/07_convolutions.ipynb 109
+@fc.patch
+def prefetch(self:DataLoaders, device=def_device, n=2, pin=None):
+    "`DataLoaders` with both dataloaders wrapped in `PrefetchLoader`"
+    return DataLoaders(*(PrefetchLoader(dl, device, n, pin) for dl in (self.train, self.valid)))
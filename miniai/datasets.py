@@ -2,17 +2,19 @@
 
 # %% ../nbs/05_datasets.ipynb 2
 from __future__ import annotations
-import math, numpy as np, matplotlib.pyplot as plt
+import math, os, shutil, tempfile, torch, numpy as np, matplotlib.pyplot as plt
+from pathlib import Path
 from operator import itemgetter
 from itertools import zip_longest
 import fastcore.all as fc
 
-from torch.utils.data import default_collate
+from torch.utils.data import default_collate, TensorDataset
+from datasets.fingerprint import Hasher
 
 from .training import *
 
 # %% auto 0
-__all__ = ['inplace', 'collate_dict', 'show_image', 'subplots', 'get_grid', 'show_images', 'DataLoaders']
+__all__ = ['inplace', 'collate_dict', 'show_image', 'subplots', 'get_grid', 'show_images', 'cache_ds', 'DataLoaders']
 
 # %% ../nbs/05_datasets.ipynb 41
 def inplace(f):
@@ -127,11 +129,52 @@ def show_images(ims: list, # Images to show
     # import ipdb; ipdb.set_trace()
     for im, t, ax in zip_longest(ims, titles or [], axs): show_image(im, ax=ax, title=t)
 
-# %% ../nbs/05_datasets.ipynb 86
+# %% ../nbs/05_datasets.ipynb 87
+def cache_ds(ds, # Hugging Face `Dataset` (usually with a transform set by `with_transform`)
+             path, # folder to keep caches in
+             chunk=1000 # number of items to transform at once
+            ):
+    "Transformed features of `ds` as a `TensorDataset` of memory-mapped tensors, computed once and cached in `path`"
+    path = Path(path)/Hasher.hash([ds._fingerprint, ds.format])
+    if not path.exists():
+        # write to a temporary folder first, so that other processes never see partially written cache
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(dir=path.parent))
+        arrs = {}
+        for i in range(0, len(ds), chunk):
+            # `ds[i:j]` is a dict of lists of transformed features
+            b = ds[i:i+chunk]
+            for k in ds.features:
+                v = default_collate(b[k]).numpy()
+                if k not in arrs: arrs[k] = np.lib.format.open_memmap(tmp/f'{k}.npy', mode='w+', dtype=v.dtype, shape=(len(ds),*v.shape[1:]))
+                arrs[k][i:i+len(v)] = v
+        for o in arrs.values(): o.flush()
+        del arrs
+        try: os.rename(tmp, path)
+        # another process finished first - use its cache
+        except OSError: shutil.rmtree(tmp)
+    return TensorDataset(*(torch.from_numpy(np.load(path/f'{k}.npy', mmap_mode='c')) for k in ds.features))
+
+# %% ../nbs/05_datasets.ipynb 88
+def _collate_tensors(keys=None):
+    # collate `TensorDataset` items into a tuple of tensors, or a dict keyed by `keys`
+    def _f(b):
+        b = default_collate(b)
+        return tuple(b) if keys is None else dict(zip(keys, b))
+    return _f
+
 class DataLoaders: 
     def __init__(self, *dls): self.train, self.valid = dls[:2]
     
     @classmethod
-    def from_dd(cls, dd, batch_size, as_tuple=True, **kwargs):
-        f = collate_dict(dd['train'])
+    def from_dd(cls, dd, batch_size, as_tuple=True, cache=None, **kwargs):
+        keys = None if as_tuple else list(dd['train'].features)
+        # with `cache` transformed data is stored in memory-mapped files and served in slices by `TensorLoader`
+        if cache is not None:
+            dss = [cache_ds(ds, cache) for ds in dd.values()]
+            # `TensorLoader` only yields tuples and only takes `drop_last`: otherwise use a regular `DataLoader`
+            if as_tuple and set(kwargs) <= {'drop_last'}: return cls(*get_dls(*dss, bs=batch_size, fast=True, **kwargs))
+            return cls(*get_dls(*dss, bs=batch_size, collate_fn=_collate_tensors(keys), **kwargs))
+        # `default_collate` of a list of dicts is a dict of batched features
+        f = collate_dict(dd['train']) if as_tuple else default_collate
         return cls(*get_dls(*dd.values(), bs=batch_size, collate_fn=f, **kwargs))
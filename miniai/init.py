@@ -1,14 +1,15 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/11_initializing.ipynb.
 
 # %% auto 0
-__all__ = ['clean_ipython_hist', 'clean_tb', 'clean_mem', 'BatchTransformCB', 'GeneralRelu', 'plot_func', 'init_weights',
-           'lsuv_init', 'conv', 'get_model']
+__all__ = ['clean_ipython_hist', 'clean_tb', 'clean_mem', 'BatchTransformCB', 'Stage', 'PipelineCB', 'GeneralRelu', 'plot_func',
+           'init_weights', 'lsuv_init', 'lsuv_model', 'conv', 'get_model']
 
 # %% ../nbs/11_initializing.ipynb 3
 import pickle,gzip,math,os,time,shutil,torch,matplotlib as mpl,numpy as np,matplotlib.pyplot as plt
-import sys,gc,traceback
+import sys,gc,traceback,threading,queue
 import fastcore.all as fc
 from collections.abc import Mapping
+from collections import defaultdict
 from pathlib import Path
 from operator import attrgetter,itemgetter
 from functools import partial
@@ -61,17 +62,162 @@ def clean_mem():
     torch.cuda.empty_cache()
      
 
-# %% ../nbs/11_initializing.ipynb 100
+# %% ../nbs/11_initializing.ipynb 98
 class BatchTransformCB(Callback):
     # tfm can be nn.Sequential in order to combine several transforms
     def __init__(self, tfm, on_train=True, on_val=True): fc.store_attr()
     
     def before_batch(self, learn):
+        # check correct mode (train and valid)
         if (self.on_train and learn.training) or (self.on_val and not learn.training):
-            # transform batch during the `before_batch` stage
+            # substitute batch with a transformed batch during the `before_batch` stage
             learn.batch = self.tfm(learn.batch)
 
-# %% ../nbs/11_initializing.ipynb 111
+# %% ../nbs/11_initializing.ipynb 108
+class Stage:
+    "A batch transform `tfm` that runs in a 'worker', on a 'thread' or on the 'device'"
+    def __init__(self, tfm, where='device', deterministic=False, on_train=True, on_val=True, name=None):
+        assert where in ('worker', 'thread', 'device')
+        fc.store_attr()
+        if name is None: self.name = getattr(tfm, '__name__', type(tfm).__name__)
+
+    def __call__(self, b, training, times):
+        if not (self.on_train if training else self.on_val): return b
+        start = time.perf_counter()
+        b = self.tfm(b)
+        times.append((self.name, time.perf_counter()-start))
+        return b
+
+class _StagedCollate:
+    "`collate_fn` that runs worker stages after `collate`, and returns their times along with the batch"
+    def __init__(self, collate, stages, training): fc.store_attr()
+    def __call__(self, b):
+        times = []
+        b = self.collate(b)
+        for s in self.stages: b = s(b, self.training, times)
+        return b, times
+
+class _StagedLoader:
+    "Iterate `dl`, running `stages` on a background thread `n` batches ahead when `n>0`, and collecting stage times in `cb`"
+    def __init__(self, dl, stages, training, cb, timed, n=2): fc.store_attr()
+    def __len__(self): return len(self.dl)
+    def __getattr__(self, k):
+        # forward everything else (e.g. `dataset`) to the wrapped loader
+        if k.startswith('__') or k == 'dl': raise AttributeError(k)
+        return getattr(self.dl, k)
+    # wrap `dl` (e.g. a subset of `self.dl`, see `subset_dl`) with the same stages
+    def rewrap(self, dl): return _StagedLoader(dl, self.stages, self.training, self.cb, self.timed, self.n)
+
+    def _prep(self, b):
+        ts = []
+        # batches from a `_StagedCollate` come with the times of their worker stages
+        if self.timed: b, ts = b
+        for s in self.stages: b = s(b, self.training, ts)
+        return b, ts
+
+    def _gen(self):
+        if not self.n:
+            yield from map(self._prep, self.dl)
+            return
+        q, stop = queue.Queue(self.n), threading.Event()
+        def _work():
+            try:
+                for b in self.dl:
+                    if stop.is_set(): return
+                    q.put(('batch', self._prep(b)))
+                q.put(('done', None))
+            except Exception as e: q.put(('error', e))
+        th = threading.Thread(target=_work, daemon=True)
+        th.start()
+        try:
+            while True:
+                kind, o = q.get()
+                if kind == 'done': return
+                if kind == 'error': raise o
+                yield o
+        finally:
+            # stop the worker if iteration ends early (e.g. `CancelEpochException`), unblocking its `put`
+            stop.set()
+            while th.is_alive():
+                try: q.get_nowait()
+                except queue.Empty: th.join(0.01)
+
+    def __iter__(self):
+        # let `cb` know which loader the current batches come from, so that it caches device stages per loader
+        prev, self.cb.cur = self.cb.cur, self
+        try:
+            for b, ts in self._gen():
+                for k,t in ts: self.cb.times[k].append(t)
+                yield b
+        finally:
+            if self.cb.cur is self: self.cb.cur = prev
+
+class PipelineCB(BatchTransformCB):
+    # run after `DeviceCB`, so that device stages get batches on the device
+    order = DeviceCB.order+1
+    def __init__(self, *stages, 
+                 n=2, # number of batches that thread stages prepare ahead
+                 cache_mb=512 # max size (in MB) of the cached device stages of validation batches, 0 to disable caching
+                ):
+        self.stages, self.n, self.cache_mb = stages, n, cache_mb
+        self.times, self.cur = defaultdict(list), None
+
+    def _where(self, w): return [s for s in self.stages if s.where == w]
+
+    def before_fit(self, learn):
+        # wrap the dataloaders themselves, so that our loader is the innermost one, whatever other callbacks wrap later
+        self.orig, self.caches, self.cache_size = (learn.dls.train, learn.dls.valid), {}, 0
+        self.collates, dls = [], []
+        for dl, training in zip(self.orig, (True, False)):
+            stages, timed = self._where('thread'), False
+            if self._where('worker'):
+                if hasattr(dl, 'collate_fn'):
+                    self.collates.append((dl, dl.collate_fn))
+                    dl.collate_fn, timed = _StagedCollate(dl.collate_fn, self._where('worker'), training), True
+                else: stages = self._where('worker') + stages
+            run_thread = bool(self._where('thread')) or (bool(stages) and not timed)
+            dls.append(_StagedLoader(dl, stages, training, self, timed, self.n if run_thread else 0))
+        learn.dls.train, learn.dls.valid = dls
+        # leading deterministic device stages can be cached, the rest always runs
+        dev = self._where('device')
+        i = next((i for i,s in enumerate(dev) if not s.deterministic), len(dev))
+        self.det, self.rest = dev[:i], dev[i:]
+
+    def cleanup_fit(self, learn):
+        learn.dls.train, learn.dls.valid = self.orig
+        for dl, f in self.collates: dl.collate_fn = f
+        self.caches, self.cache_size, self.cur = {}, 0, None
+
+    def _cache(self, learn):
+        # validation batches of a loader come in the same order every epoch, so each of our loaders has its own cache
+        # (other loaders, e.g. a `dl` passed to `validate`, aren't cached)
+        if learn.training or not self.cache_mb or self.cur is None: return None
+        return self.caches.setdefault(self.cur, {})
+
+    def _add(self, cache, i, b):
+        # cache batches until `cache_mb` is used up
+        sz = sum(t.numel()*t.element_size() for t in b if isinstance(t, torch.Tensor))
+        if self.cache_size+sz > self.cache_mb*2**20: return
+        cache[i] = b
+        self.cache_size += sz
+
+    def before_batch(self, learn):
+        ts, b = [], learn.batch
+        if self.det:
+            cache = self._cache(learn)
+            if cache is not None and learn.iter in cache: b = cache[learn.iter]
+            else:
+                for s in self.det: b = s(b, learn.training, ts)
+                if cache is not None: self._add(cache, learn.iter, b)
+        for s in self.rest: b = s(b, learn.training, ts)
+        for k,t in ts: self.times[k].append(t)
+        learn.batch = b
+
+    def stats(self):
+        "count, mean and total time (in ms) of every stage"
+        return {k: dict(n=len(v), mean=sum(v)/len(v)*1e3, total=sum(v)*1e3) for k,v in self.times.items()}
+
+# %% ../nbs/11_initializing.ipynb 116
 class GeneralRelu(nn.Module):
     def __init__(self, leak=None, sub=None, maxv=None):
         super().__init__()
@@ -79,13 +225,15 @@ class GeneralRelu(nn.Module):
         
     def forward(self, x):
         x = F.leaky_relu(x, self.leak) if self.leak is not None else F.relu(x)
+        # subtract value to pull relu down
         if self.sub is not None: x -= self.sub
+        # clamp relu to a max value if provided
         if self.maxv is not None: x.clamp_max_(self.maxv)
         return x
 
-# %% ../nbs/11_initializing.ipynb 113
+# %% ../nbs/11_initializing.ipynb 118
 def plot_func(f, start=-5, end=5, steps=100):
-    # setup x
+    # setup x lisnapce
     x = torch.linspace(start,end,steps)
     # plot function
     plt.plot(x, f(x))
@@ -95,18 +243,19 @@ def plot_func(f, start=-5, end=5, steps=100):
     plt.axhline(y=0, color='k', linewidth=0.7)
     plt.axvline(x=0, color='k', linewidth=0.7)
 
-# %% ../nbs/11_initializing.ipynb 117
+# %% ../nbs/11_initializing.ipynb 122
 def init_weights(m, leaky=0.):
     # init kaiming normal for conv layers
     if isinstance(m, (nn.Conv1d, nn.Conv2d, nn.Conv3d)): 
         init.kaiming_normal_(m.weight, a=leaky)
 
-# %% ../nbs/11_initializing.ipynb 127
+# %% ../nbs/11_initializing.ipynb 131
 def _lsuv_stats(hook, # hook object
                 mod, # module to hook onto
                 inp, # input to a layer (x or output from previous layer)
                 outp # output - activations of a model's layer
                ):
+    # move acts to a cpu, attach mean and std to a hook
     acts = to_cpu(outp)
     hook.mean = acts.mean()
     hook.std = acts.std()
@@ -126,7 +275,50 @@ def lsuv_init(model,
             m_in.weight.data /= h.std
     h.remove()
 
-# %% ../nbs/11_initializing.ipynb 141
+# %% ../nbs/11_initializing.ipynb 140
+def lsuv_model(model,
+               ms, # list of output modules
+               ms_in, # list of input modules
+               xb, # batch
+               tol=1e-3, # tolerance for mean and std-1
+               max_iter=20 # max number of iterations per layer
+              ):
+    # top-level children of a Sequential are run separately, so that we can start from a cached input
+    stages = list(model.children()) if isinstance(model, nn.Sequential) else [model]
+    def _stage(m): return next(i for i,s in enumerate(stages) if any(o is m for o in s.modules()))
+    # go through pairs in order of their input modules
+    pairs = sorted(zip(ms, ms_in), key=lambda p: _stage(p[1]))
+    res, x, cur = [], xb, 0
+    with torch.no_grad():
+        for m, m_in in pairs:
+            s0, s1 = _stage(m_in), _stage(m)
+            # upstream stages are already initialised, so run them once and cache their output
+            while cur < s0: x, cur = stages[cur](x), cur+1
+            def _run():
+                o = x
+                for s in stages[s0:s1+1]: o = s(o)
+            start, n = time.perf_counter(), 0
+            # the output of `m_in` is affine in its weight and bias, so standardise it in one step first
+            h = Hook(m_in, _lsuv_stats)
+            _run()
+            h.remove()
+            if m_in.bias is not None: m_in.bias.sub_(h.mean).div_(h.std)
+            m_in.weight.div_(h.std)
+            h = Hook(m, _lsuv_stats)
+            _run()
+            # then iterate on the stats of `m` (a no-op when `m` is `m_in`)
+            while n < max_iter and (abs(h.std-1)>tol or abs(h.mean)>tol):
+                if m_in.bias is not None: m_in.bias -= h.mean
+                m_in.weight /= h.std
+                _run()
+                n += 1
+            h.remove()
+            ok = abs(h.std-1)<=tol and abs(h.mean)<=tol
+            res.append(dict(module=type(m_in).__name__, iters=n, mean=h.mean.item(), std=h.std.item(), converged=bool(ok),
+                            secs=time.perf_counter()-start))
+    return res
+
+# %% ../nbs/11_initializing.ipynb 150
 def conv(ni, nf, ks=3, stride=2, act=nn.ReLU, norm=None, bias=None):
     # if Normalization is of type BN, than we don't need bias
     if bias is None: bias = not isinstance(norm, (nn.BatchNorm1d, nn.BatchNorm2d, nn.BatchNorm3d))
@@ -139,7 +331,7 @@ def conv(ni, nf, ks=3, stride=2, act=nn.ReLU, norm=None, bias=None):
     # pull all layers into Sequential
     return nn.Sequential(*layers)          
 
-# %% ../nbs/11_initializing.ipynb 142
+# %% ../nbs/11_initializing.ipynb 151
 def get_model(act=nn.ReLU, nfs=None, norm=None):
     # standard number of filters ([1,8,16,32,64])
     if nfs is None: nfs = [1,8,16,32,64]
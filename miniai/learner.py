@@ -1,19 +1,28 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/09_learner.ipynb.
 
 # %% auto 0
-__all__ = ['CancelFitException', 'CancelBatchException', 'CancelEpochException', 'Callback', 'run_cbs', 'SingleBatchCB', 'to_cpu',
-           'MetricsCB', 'DeviceCB', 'TrainCB', 'ProgressCB', 'with_cbs', 'Learner', 'TrainLearner', 'MomentumLearner',
-           'LRFinderCB', 'lr_find']
+__all__ = ['CancelFitException', 'CancelBatchException', 'CancelEpochException', 'Callback', 'cb_methods', 'run_cbs',
+           'SingleBatchCB', 'to_cpu', 'MetricsCB', 'DeviceCB', 'TrainCB', 'ProgressCB', 'with_cbs', 'Learner',
+           'TrainLearner', 'MomentumLearner', 'lr_suggestions', 'LRFinderCB', 'snapshot', 'lr_find', 'MixedPrecisionCB',
+           'CompileCB', 'TraceCB', 'DDPCB', 'fit_ddp', 'share_dls', 'sample_space', 'ASHACB', 'SweepResults',
+           'run_sweep', 'stratified_idxs', 'subset_dl', 'ValidateCB', 'EarlyStoppingCB']
 
 # %% ../nbs/09_learner.ipynb 2
-import math, torch, matplotlib.pyplot as plt
+import io, os, math, time, random, json, itertools, warnings, torch, matplotlib.pyplot as plt
 import fastcore.all as fc
 from collections.abc import Mapping
+from collections import defaultdict
+from pathlib import Path
 from operator import attrgetter
 from functools import partial
-from copy import copy
+from copy import copy, deepcopy
+from contextlib import contextmanager, nullcontext
+import torch.multiprocessing as mp
+import torch.distributed as dist
+from torch.nn.parallel import DistributedDataParallel
+from torch.utils.data import DataLoader, DistributedSampler, TensorDataset
 
-from torch import optim
+from torch import nn, optim
 import torch.nn.functional as F
 
 from .conv import *
@@ -29,15 +38,18 @@ class CancelEpochException(Exception): pass
 class Callback: order = 0
 
 # %% ../nbs/09_learner.ipynb 34
+def cb_methods(cbs, # List of callbacks
+               method_nm: str):
+    "Bound `method_nm` methods of `cbs`, in order of 'order'"
+    # sort callbacks by 'order' and grab their `method_nm` if it exists
+    ms = (getattr(cb, method_nm, None) for cb in sorted(cbs, key=attrgetter('order')))
+    return [m for m in ms if m is not None]
+
 def run_cbs(cbs, # List of callbacks, 
             method_nm: str, 
             learn=None):
-    # loop through all the callbacks in order of 'order'
-    # import ipdb; ipdb.set_trace()
-    for cb in sorted(cbs,key=attrgetter('order')):
-        # get their `method_nm` if it exists and call them on the learner
-        method = getattr(cb, method_nm, None)
-        if method is not None: method(learn)
+    # loop through all the callbacks in order of 'order' and call their `method_nm` on the learner
+    for method in cb_methods(cbs, method_nm): method(learn)
 
 # %% ../nbs/09_learner.ipynb 45
 class SingleBatchCB(Callback):
@@ -46,6 +58,7 @@ class SingleBatchCB(Callback):
 
 # %% ../nbs/09_learner.ipynb 58
 from torcheval.metrics import MulticlassAccuracy, Mean
+from torcheval.metrics.toolkit import sync_and_compute
 
 # %% ../nbs/09_learner.ipynb 62
 def to_cpu(x):
@@ -63,8 +76,10 @@ def to_cpu(x):
 
 # %% ../nbs/09_learner.ipynb 65
 class MetricsCB(Callback):
-    def __init__(self, 
+    def __init__(self,
                  *ms, # list of metrics
+                 on_device=False, # accumulate metrics on the training device instead of moving every batch to cpu
+                 log_every=None, # optionally also log running metrics every `log_every` training batches
                  **metrics, # dictionary of metrics
                 ):
         # pool all unnamed metrics into a dictionary `metrics` using __name__ of its type as key
@@ -75,39 +90,72 @@ class MetricsCB(Callback):
         self.all_metrics = copy(self.metrics)
         # add 'loss' metric (Mean()) to `all_metrics`, add it to `self.loss` for quick access
         self.all_metrics['loss'] = self.loss = Mean()
-        
+        self.on_device, self.log_every = on_device, log_every
+        # optional function computing a metric across processes (set by `DDPCB`)
+        self.sync = None
+
     def _log(self, d): print(d)
-    def before_fit(self, learn): learn.metrics = self # attach MetricsCB to a learner `metrics` property
+    def value(self, k):
+        "Current value of metric `k` (over all processes with `DDPCB`)"
+        v = self.all_metrics[k]
+        if self.sync is None: return v.compute().item()
+        # gloo fills the gathered states from its own thread, where inference tensors can't be written to
+        with torch.inference_mode(False): return self.sync(v).item()
+    def before_fit(self, learn):
+        learn.metrics = self # attach MetricsCB to a learner `metrics` property
+        self.device = None # device that metrics states live on (only used when `on_device`)
     def before_epoch(self, learn): [o.reset() for o in self.all_metrics.values()] # reset `all_metrics`
-   
-    def after_epoch(self, learn): 
-        # save log of `all_metrics`, using metric `compute` method and 3 floating points
-        log = {k: f'{v.compute():.3f}' for k,v in self.all_metrics.items()} 
+
+    def _compute(self, learn):
+        # log of `all_metrics`, using metric `compute` method and 3 floating points. This is the only place we sync
+        log = {k: f'{self.value(k):.3f}' for k in self.all_metrics}
         # add `epoch` to log and `train` mode: `train` or `eval`
         log['epoch'] = learn.epoch
         log['train'] = 'train' if learn.model.training else 'valid'
-        # pass to _log
-        self._log(log)
-    
+        return log
+
+    def after_epoch(self, learn): self._log(self._compute(learn))
+
+    def _to(self, device):
+        # move metrics states to `device` once, so that `update` doesn't need any copies
+        for o in self.all_metrics.values(): o.to(device)
+        self.device = device
+
     def after_batch(self, learn):
-        # move learner batch to cpu and unpack to x, y and all remaining values into *
-        x,y,*_ = to_cpu(learn.batch)
-        # loop through metric values and call `update` using `learn.preds` (on cpu)
-        for o in self.metrics.values(): o.update(to_cpu(learn.preds), y)
+        if self.on_device:
+            # keep everything on device: no `to_cpu`, and batch size is taken from y instead of copying x
+            y = learn.batch[1]
+            if self.device != learn.preds.device: self._to(learn.preds.device)
+            preds, loss = learn.preds.detach(), learn.loss.detach()
+        else:
+            # move targets to cpu (x is not needed, only its length which is the same as y)
+            y = to_cpu(learn.batch[1])
+            preds, loss = to_cpu(learn.preds), to_cpu(learn.loss)
+        # loop through metric values and call `update` using `learn.preds`
+        for o in self.metrics.values(): o.update(preds, y)
         # update loss separately using `learn.loss` and batch size as weight
-        self.loss.update(to_cpu(learn.loss), weight=len(x))
+        self.loss.update(loss, weight=len(y))
+        # log running metrics as `epoch:batch` every `log_every` training batches
+        if self.log_every and learn.training and (learn.iter+1) % self.log_every == 0:
+            log = self._compute(learn)
+            log['epoch'] = f'{learn.epoch}:{learn.iter+1}'
+            self._log(log)
 
 # %% ../nbs/09_learner.ipynb 68
 class DeviceCB(Callback):
-    # init with def_device (cuda)
-    def __init__(self, device=def_device): fc.store_attr()
+    # init with def_device (cuda). If `prefetch` > 0, batches are moved ahead of time by a `PrefetchLoader`
+    def __init__(self, device=def_device, prefetch=0): fc.store_attr()
     # put model to device before fitting
     def before_fit(self, learn):
         if hasattr(learn.model, 'to'): learn.model.to(self.device)
-    # put batch to device before batch
-    def before_batch(self, learn): learn.batch = to_device(learn.batch, self.device)
+    # wrap dataloader to prepare `prefetch` batches on a background thread. Its `stats` are kept in `self.loader`
+    def before_epoch(self, learn):
+        if self.prefetch: learn.dl = self.loader = PrefetchLoader(learn.dl, self.device, self.prefetch)
+    # put batch to device before batch (already done by the loader when prefetching)
+    def before_batch(self, learn):
+        if not self.prefetch: learn.batch = to_device(learn.batch, self.device)
 
-# %% ../nbs/09_learner.ipynb 74
+# %% ../nbs/09_learner.ipynb 78
 class TrainCB(Callback):
     """Basic training callback"""
     # n_inp allows to train models with more than one input
@@ -118,78 +166,117 @@ class TrainCB(Callback):
     def step(self, learn): learn.opt.step()
     def zero_grad(self, learn): learn.opt.zero_grad()
 
-# %% ../nbs/09_learner.ipynb 76
+# %% ../nbs/09_learner.ipynb 80
 class ProgressCB(Callback):
     # decrease callback priority
     order = MetricsCB.order + 1
-    def __init__(self, plot=False): self.plot = plot
-    
+    def __init__(self,
+                 plot=False, # plot train and valid losses
+                 every=1, # update comment and plot every `every` batches
+                 secs=None, # also update if more than `secs` seconds passed since the last update
+                 max_pts=500 # max number of points in the train loss plot (older losses get averaged)
+                ): fc.store_attr()
+
     def before_fit(self, learn):
         # create master_bar and set it to both mbar and learn.epochs
         learn.epochs = self.mbar = master_bar(learn.epochs)
         self.first = True
         # substitute _log method of learn's metrics (simple print) with progress bar
         if hasattr(learn, 'metrics'): learn.metrics._log = self._log
-        # keep track of train and valid losses
+        # keep track of train and valid losses. Train losses are averaged into bins of `self.w` batches
         self.losses = []
         self.val_losses = []
-    
+        self.w, self.part = 1, []
+        # on-device buffer of an epoch losses, allocated on the first batch
+        self.buf = None
+
     def _log(self, d):
         # import ipdb; ipdb.set_trace()
         # if first run setup the column titles (['accuracy', 'loss', 'epoch', 'train'])
         if self.first:
             self.mbar.write(list(d), table=True)
             self.first = False
-        self.mbar.write(list(d.values()), table=True)
-        
-    def before_epoch(self, learn): 
+        # as strings, which the console version of the progress bar needs
+        self.mbar.write([str(v) for v in d.values()], table=True)
+
+    def before_epoch(self, learn):
+        self.n, self.start, self.last = len(learn.dl), 0, time.time()
         # here learn.dl is wrapped by progress_bar
         # During the call to enumerate in Learner progress_bar gen (learner dataloader) attribute is used
         learn.dl = progress_bar(learn.dl, leave=False, parent=self.mbar)
-        
+
+    def _add_loss(self, v):
+        # add loss to the current bin, and once there are `max_pts` bins merge them pairwise (doubling bin width)
+        self.part.append(v)
+        if len(self.part) < self.w: return
+        self.losses.append(sum(self.part)/self.w)
+        self.part = []
+        if len(self.losses) >= self.max_pts:
+            self.losses = [(a+b)/2 for a,b in zip(self.losses[::2], self.losses[1::2])]
+            self.w *= 2
+
+    def _plot(self, learn, n_val):
+        self.mbar.update_graph(
+            # plot training losses (x is in batches)
+            [[fc.L.range(self.losses).map(lambda x: x*self.w), self.losses],
+             # plot validation losses, converting from epochs to batches
+             [fc.L.range(n_val).map(lambda x: (x+1)*len(learn.dls.train)), self.val_losses]])
+
     def after_batch(self, learn):
-        # print our batch loss (comment on the right of the progress_bar)
-        learn.dl.comment = f'{learn.loss:.3f}'
+        # store loss on device without syncing
+        loss = learn.loss.detach()
+        if self.buf is None or len(self.buf) < self.n or self.buf.device != loss.device:
+            # a normal tensor even when allocated during validation, so that training can write into it too
+            with torch.inference_mode(False): self.buf = torch.empty(self.n, dtype=torch.float32, device=loss.device)
+        self.buf[learn.iter] = loss
+        end = learn.iter+1
+        if end-self.start < self.every and end < self.n and not (self.secs and time.time()-self.last >= self.secs): return
+        # read all losses since the last update back in bulk
+        losses = self.buf[self.start:end].tolist()
+        self.start, self.last = end, time.time()
+        # print our last batch loss (comment on the right of the progress_bar)
+        learn.dl.comment = f'{losses[-1]:.3f}'
         if self.plot and hasattr(learn, 'metrics') and learn.training:
-            self.losses.append(learn.loss.item())
-            if self.val_losses: 
-                self.mbar.update_graph(
-                    [[fc.L.range(self.losses), self.losses],
-                     [fc.L.range(learn.epoch).map(lambda x: (x+1)*len(learn.dls.train)), 
-                      self.val_losses]])
-                   
+            for v in losses: self._add_loss(v)
+            if self.val_losses: self._plot(learn, learn.epoch)
+
     def after_epoch(self, learn):
         if not learn.training:
             if self.plot and hasattr(learn, 'metrics'):
                 # import ipdb; ipdb.set_trace()
                 # append to validation losses
-                self.val_losses.append(learn.metrics.all_metrics['loss'].compute())
-                self.mbar.update_graph(
-                    # plot training losses
-                    [[fc.L.range(self.losses), self.losses],
-                     # plot validation losses, converting from epochs to batches
-                     [fc.L.range(learn.epoch+1).map(lambda x: (x+1)*len(learn.dls.train)), 
-                      self.val_losses]])
-
-# %% ../nbs/09_learner.ipynb 84
+                self.val_losses.append(learn.metrics.all_metrics['loss'].compute().item())
+                self._plot(learn, learn.epoch+1)
+
+# %% ../nbs/09_learner.ipynb 88
 class with_cbs:
-    def __init__(self, nm: str): self.nm = nm
+    def __init__(self, nm: str): 
+        self.nm = nm
+        # precompute event names and the exception to catch, so that `_f` doesn't format strings on every call
+        self.before, self.after, self.cleanup = f'before_{nm}', f'after_{nm}', f'cleanup_{nm}'
+        self.exc = globals()[f'Cancel{nm.title()}Exception']
+        
     def __call__(self, f):
         # create internal _f that uses try block and calls `before_nm` and `after_nm` callbacks on `o`
-        # checkng for exception in globals() and finally calling cleanup
+        # checkng for Cancel exception and finally calling cleanup
         def _f(o, *args, **kwargs):
+            # with a tracer attached, time the whole event including its callbacks
+            tr = getattr(o, 'tracer', None)
+            if tr is not None: start = tr.now()
             try:
-                o.callback(f'before_{self.nm}') 
+                o.callback(self.before) 
                 # we need to pass `o` as well as *args will not include it
                 # because it is separately stored to o
                 f(o, *args, **kwargs)
-                o.callback(f'after_{self.nm}')
+                o.callback(self.after)
             # if there is another exception - it runs finally directly
-            except globals()[f'Cancel{self.nm.title()}Exception']: pass #print(f"Got Cancel{self.nm.title()}Exception") # pass
-            finally: o.callback(f'cleanup_{self.nm}')
+            except self.exc: pass
+            finally:
+                o.callback(self.cleanup)
+                if tr is not None: tr.record(self.nm, 'event', start)
         return _f
 
-# %% ../nbs/09_learner.ipynb 86
+# %% ../nbs/09_learner.ipynb 90
 class Learner:
     def __init__(self, 
                  model, # model to be used for training
@@ -200,10 +287,25 @@ class Learner:
                  opt_func=optim.SGD # optimizer
                 ):
         fc.store_attr()
+        # no gradient accumulation or micro-batches until `fit` says otherwise
+        self.accum, self.micro_bs, self.n_iter, self.n_steps = 1, None, None, 0
+        # dispatch table: event name -> list of bound callback methods (see `callback`)
+        self._cb_tbl = {}
+        # optional tracer (see `TraceCB`), which times events, callbacks and data loading when set
+        self.tracer = None
+        # batch to start the next epoch from, set when resuming mid-epoch (see `CheckpointCB`)
+        self.start_iter = 0
+        # whether the current validation is an intra-epoch one on a subset (see `ValidateCB`)
+        self.intra_val = False
         
     
-    @with_cbs('batch')
-    def _one_batch(self):
+    def _micro_batches(self):
+        # split batch into micro-batches of at most `micro_bs` items
+        if not self.micro_bs or len(self.batch[0]) <= self.micro_bs: return [self.batch]
+        return [type(self.batch)(o) for o in zip(*(t.split(self.micro_bs) for t in self.batch))]
+    
+    
+    def _one_micro(self, scale=1.):
         # predict followed by an after callback
         self.predict()
         self.callback('after_predict')
@@ -212,11 +314,41 @@ class Learner:
         self.callback('after_loss')
         # if training
         if self.training:
-            # backward followed by an after callback
+            # backward followed by an after callback. The loss is scaled, so that grads of micro-batches 
+            # and accumulated batches add up to the grads of their mean, but callbacks see the actual loss
+            loss = self.loss
+            if scale != 1: self.loss = loss*scale
             self.backward()
+            self.loss = loss
             self.callback('after_backward')
+    
+    
+    def _do_step(self):
+        # step every `accum` batches and on the last batch of an epoch
+        i = self.iter+1
+        return i % self.accum == 0 or i == self.n_iter
+    
+    
+    @with_cbs('batch')
+    def _one_batch(self):
+        # number of batches that will be accumulated into the current step
+        n_acc = self.accum if self.n_iter is None else min(self.accum, self.n_iter - self.iter//self.accum*self.accum)
+        mbs = self._micro_batches()
+        if len(mbs) == 1: self._one_micro(1/n_acc)
+        else:
+            # run all micro-batches, then put back full batch, its preds and (mean) loss for the callbacks
+            batch, n, preds, loss = self.batch, len(self.batch[0]), [], 0.
+            for self.batch in mbs:
+                frac = len(self.batch[0])/n
+                self._one_micro(frac/n_acc)
+                preds.append(self.preds.detach())
+                loss = loss + self.loss.detach()*frac
+            self.batch, self.preds, self.loss = batch, torch.cat(preds), loss
+        if self.training and self._do_step():
             # step followed by an after callback
+            self.callback('before_step')
             self.step()
+            self.n_steps += 1
             self.callback('after_step')
             # zero grad
             self.zero_grad()
@@ -225,13 +357,18 @@ class Learner:
     @with_cbs('epoch')
     def _one_epoch(self):
         # iterate through dls calling one batch
-        for self.iter, self.batch in enumerate(self.dl): self._one_batch()
+        dl = self.dl if self.tracer is None else self.tracer.iter_dl(self.dl)
+        # skip the batches that were already done before a resumed checkpoint
+        start, self.start_iter = self.start_iter, 0
+        if start: dl = itertools.islice(dl, start, None)
+        for self.iter, self.batch in enumerate(dl, start): self._one_batch()
         
     
-    def one_epoch(self, training):
-        # set the model mode and get dl
+    def one_epoch(self, training, dl=None):
+        # set the model mode and get dl (`dl` replaces the default one, e.g. to validate on a subset)
         self.model.train(training)
-        self.dl = self.dls.train if training else self.dls.valid
+        self.dl = dl if dl is not None else self.dls.train if training else self.dls.valid
+        self.n_iter = len(self.dl) if hasattr(self.dl, '__len__') else None
         # run one epoch
         self._one_epoch()
         
@@ -241,19 +378,35 @@ class Learner:
         # loop through epochs for train and valid
         for self.epoch in self.epochs:
             if train: self.one_epoch(True)
-            if valid: torch.no_grad()(self.one_epoch)(False)
+            if valid: self.validate()
+    
+    
+    def validate(self, dl=None):
+        # inference mode is cheaper than `no_grad`, as tensors don't track versions or views
+        with torch.inference_mode(): self.one_epoch(False, dl)
+        # the last batch's outputs are inference tensors, copy them so that they can be used outside of it
+        for k in ('preds', 'loss'):
+            v = getattr(self, k, None)
+            if torch.is_tensor(v) and v.is_inference(): setattr(self, k, v.clone())
     
         
-    def fit(self, n_epochs=1, train=True, valid=True, cbs=None, lr=None):
+    def fit(self, n_epochs=1, train=True, valid=True, cbs=None, lr=None, 
+            accum=1, # number of batches to accumulate gradients over before each optimizer step
+            micro_bs=None # split each batch into micro-batches of at most `micro_bs` items
+           ):
         # cast callbacks to L
         cbs = fc.L(cbs)
         # add extra temporary callbacks to the Learner callbacks
         for cb in cbs: self.cbs.append(cb)
+        # callbacks changed, so the dispatch table needs to be rebuilt
+        self._cb_tbl = {}
         # try block
         try:
             # create number of epochs, their range, lr (if not passed) and optimizer
             self.n_epochs = n_epochs
             self.epochs = range(n_epochs)
+            # gradient accumulation settings and number of optimizer steps taken
+            self.accum, self.micro_bs, self.n_steps = accum, micro_bs, 0
             if lr is None: lr = self.lr
             self.opt = self.opt_func(self.model.parameters(), lr)
             # fit train and valid
@@ -261,6 +414,7 @@ class Learner:
         # remove cbs in finally
         finally: 
             for cb in cbs: self.cbs.remove(cb)
+            self._cb_tbl = {}
     
 
     def __getattr__(self, name):
@@ -269,19 +423,29 @@ class Learner:
         Runs `callback` method to loop through all callbacks and call those that have a specified name. For example `predict` from TrainCB
         Return partial (instead of self.callback(name)) because we want to return a function, not a value (which is None). In run_cbs 
         the last line is method(learn) - see how it works with TrainCB class methods that actually implement methods below
+        The partial is cached in the instance `__dict__`, so `__getattr__` is only hit on the first call of each name
         """
         if name in ('predict', 'get_loss', 'backward', 'step', 'zero_grad'):
-            return partial(self.callback, name)
+            f = self.__dict__[name] = partial(self.callback, name)
+            return f
         raise AttributeError(name)
         
         
-    def callback(self, method_nm): run_cbs(self.cbs, method_nm, self)
+    def callback(self, method_nm):
+        # grab sorted bound methods for `method_nm` from the dispatch table, building them on the first call
+        ms = self._cb_tbl.get(method_nm)
+        if ms is None:
+            ms = cb_methods(self.cbs, method_nm)
+            # the tracer wraps the methods once when the entry is built, so untraced calls cost nothing extra
+            if self.tracer is not None: ms = self.tracer.wrap_event(method_nm, ms)
+            self._cb_tbl[method_nm] = ms
+        for m in ms: m(self)
         
         
     @property
     def training(self): return self.model.training
 
-# %% ../nbs/09_learner.ipynb 89
+# %% ../nbs/09_learner.ipynb 95
 class TrainLearner(Learner):
     # note that we sublcass Learner and implement below methods directly in it
     # not through cbs. So __getattr__ will not be called
@@ -291,52 +455,695 @@ class TrainLearner(Learner):
     def step(self): self.opt.step()
     def zero_grad(self): self.opt.zero_grad()
 
-# %% ../nbs/09_learner.ipynb 90
+# %% ../nbs/09_learner.ipynb 96
 class MomentumLearner(TrainLearner):
-    def __init__(self, model, dls, loss_func, lr=None, cbs=None, opt=optim.SGD, mom=0.85):
+    def __init__(self, model, dls, loss_func, lr=None, cbs=None, opt=None, mom=0.85):
         # save mom and call super init
-        self.mom = mom
+        self.mom, self.grad_mom = mom, opt is not None
+        # by default momentum is done by `FlatSGD`, in multi-tensor ops (imported here, as `miniai.sgd` imports this module)
+        if opt is None:
+            from .sgd import FlatSGD
+            opt = partial(FlatSGD, momentum=mom)
         super().__init__(model, dls, loss_func, lr, cbs, opt)
        
     def zero_grad(self):
-        # update zero_grad method to account for momentum - not zero grads completely but multiply by a constant
-        with torch.no_grad():
-            for p in self.model.parameters(): p.grad *= self.mom
+        if not self.grad_mom: return self.opt.zero_grad()
+        # other optimizers get momentum through the grads - not zero grads completely but multiply by a constant
+        # (in a single multi-tensor op, skipping params without grads, e.g. frozen ones)
+        gs = [p.grad for p in self.model.parameters() if p.grad is not None]
+        if gs: torch._foreach_mul_(gs, self.mom)
 
-# %% ../nbs/09_learner.ipynb 99
+# %% ../nbs/09_learner.ipynb 107
 from torch.optim.lr_scheduler import ExponentialLR
 
-# %% ../nbs/09_learner.ipynb 100
+# %% ../nbs/09_learner.ipynb 109
+def lr_suggestions(lrs, losses):
+    "Steepest and valley learning rates from smoothed `losses`"
+    if len(losses) < 3: return {}
+    # drop the tail after the minimum, where the loss is blowing up, and the first 10% where the average is still noisy
+    n = max(min(range(len(losses)), key=losses.__getitem__)+1, 3)
+    skip = min(len(losses)//10, n-3)
+    lrs, losses = torch.tensor(lrs[skip:n]), torch.tensor(losses[skip:n])
+    steep = (losses[1:]-losses[:-1]) / (lrs[1:].log()-lrs[:-1].log())
+    res = dict(steepest=lrs[steep.argmin()].item())
+    # longest run of decreasing losses: `start[i]` is where the run ending at `i` starts
+    start, best = [0]*len(losses), (0,0)
+    for i in range(1, len(losses)):
+        start[i] = start[i-1] if losses[i] < losses[i-1] else i
+        if i-start[i] > best[1]-best[0]: best = (start[i], i)
+    res['valley'] = lrs[best[0] + (best[1]-best[0])*2//3].item()
+    return res
+
+# %% ../nbs/09_learner.ipynb 110
 class LRFinderCB(Callback):
-    def __init__(self, gamma=1.3, max_mult=3): fc.store_attr()
+    def __init__(self, 
+                 gamma=1.3, # multiply lr by `gamma` every batch
+                 max_mult=3, # stop when the smoothed loss gets above `max_mult` times its minimum
+                 beta=0.98, # exponential smoothing of the losses
+                 every=4, # read the losses back from the device (and check for early stop) every `every` batches
+                 plot=True # plot losses and suggestions after fit
+                ): fc.store_attr()
     
     def before_fit(self, learn):
-        # screate a sched
+        # create a sched
         self.sched = ExponentialLR(learn.opt, self.gamma)
-        # create lists for storing lrs and losses
-        self.lrs, self.losses = [],[]
-        # starting value for a loss
-        self.min = math.inf
+        # create lists for storing lrs and losses; losses stay on the device until they are read in bulk
+        self.lrs, self.losses, self.smooth, self.buf = [],[],[],[]
+        # running average and min of the smoothed loss
+        self.avg, self.min = 0., math.inf
         
+    def _flush(self):
+        # one sync for all the losses since the last check
+        if not self.buf: return
+        for loss in torch.stack(self.buf).float().tolist():
+            self.losses.append(loss)
+            # debiased exponential moving average
+            self.avg = self.beta*self.avg + (1-self.beta)*loss
+            sm = self.avg/(1-self.beta**len(self.losses))
+            self.smooth.append(sm)
+            # update min loss or cancel fit if it exceeds min by a factor of `max_mult` or is nan
+            if sm < self.min: self.min = sm
+            if math.isnan(loss) or sm > self.min*self.max_mult:
+                self.buf = []
+                raise CancelFitException()
+        self.buf = []
+
     def after_batch(self, learn):
         # if not in training - CancelEpoch
         if not learn.training: raise CancelEpochException()
         # append learning rate and loss to the lists
         self.lrs.append(learn.opt.param_groups[0]['lr'])
-        loss = to_cpu(learn.loss)
-        self.losses.append(loss)
-        # update min loss or cancel fit if it exceeds min by a factor of 3 or isnan
-        if loss < self.min: self.min = loss
-        if math.isnan(loss) or (loss > self.min*self.max_mult): 
-            raise CancelFitException()
+        self.buf.append(learn.loss.detach())
+        if len(self.buf) >= self.every: self._flush()
         # scheduler step
         self.sched.step()
-    
+
+    def after_fit(self, learn): self._flush()
+
     def cleanup_fit(self, learn):
-        plt.plot(self.lrs, self.losses)
+        # lrs of batches after the one that diverged are dropped
+        self.lrs = self.lrs[:len(self.losses)]
+        self.suggestions = lr_suggestions(self.lrs, self.smooth)
+        if self.plot:
+            plt.plot(self.lrs, self.losses, alpha=0.3)
+            plt.plot(self.lrs, self.smooth)
+            for k,v in self.suggestions.items(): plt.axvline(v, ls='--', label=f'{k}: {v:.1e}', color=f'C{len(plt.gca().lines)}')
+            plt.legend()
+            plt.xscale('log')
+
+# %% ../nbs/09_learner.ipynb 113
+@contextmanager
+def snapshot(learn):
+    "Restore `learn`'s model weights, grads and optimizer (state and object) on exit"
+    model = {k: v.detach().clone() for k,v in learn.model.state_dict().items()}
+    grads = [None if p.grad is None else p.grad.clone() for p in learn.model.parameters()]
+    opt = getattr(learn, 'opt', None)
+    opt_state = None if opt is None else deepcopy(opt.state_dict())
+    try: yield
+    finally:
+        learn.model.load_state_dict(model)
+        for p,g in zip(learn.model.parameters(), grads): p.grad = g
+        if opt is None: learn.__dict__.pop('opt', None)
+        else:
+            opt.load_state_dict(opt_state)
+            learn.opt = opt
+
+def _lr_sweep(kw):
+    # runs in a forked process, on its own copy of the learner `_sweep_learn`
+    torch.set_num_threads(kw.pop('n_threads'))
+    start_lr, max_epochs = kw.pop('start_lr'), kw.pop('max_epochs')
+    cb = LRFinderCB(plot=False, **kw)
+    _sweep_learn.fit(max_epochs, lr=start_lr, cbs=cb)
+    return dict(lrs=cb.lrs, losses=cb.losses, smooth=cb.smooth, suggestions=cb.suggestions)
+
+@fc.patch
+def lr_find(self: Learner, gamma=1.3, max_mult=3, start_lr=1e-5, max_epochs=10, 
+            beta=0.98, # smoothing of the losses
+            every=4, # check for early stop every `every` batches
+            plot=True,
+            sweeps=None, # list of dicts overriding any of the arguments above, run in parallel in forked processes
+            n_procs=None # number of processes for `sweeps` (default: one per sweep, up to the number of cpus)
+           ):
+    "Find a good learning rate, leaving the model and optimizer as they were"
+    kw = dict(gamma=gamma, max_mult=max_mult, start_lr=start_lr, max_epochs=max_epochs, beta=beta, every=every)
+    if sweeps is None:
+        with snapshot(self):
+            cb = LRFinderCB(gamma=gamma, max_mult=max_mult, beta=beta, every=every, plot=plot)
+            self.fit(max_epochs, lr=start_lr, cbs=cb)
+        return cb.suggestions
+    # forked children each get a copy-on-write copy of the model, so the parent's weights are never touched
+    global _sweep_learn
+    _sweep_learn = self
+    n_procs = min(n_procs or fc.defaults.cpus, len(sweeps))
+    n_threads = max(1, torch.get_num_threads()//n_procs)
+    with mp.get_context('fork').Pool(n_procs) as pool:
+        res = pool.map(_lr_sweep, [{**kw, **o, 'n_threads': n_threads} for o in sweeps])
+    if plot:
+        for o,r in zip(sweeps, res): plt.plot(r['lrs'], r['smooth'], label=str(o))
+        plt.legend()
         plt.xscale('log')
+    return res
+
+# %% ../nbs/09_learner.ipynb 124
+class MixedPrecisionCB(Callback):
+    # run after `DeviceCB` so that we know where the model is
+    order = DeviceCB.order + 10
+    def __init__(self,
+                 dtype=None, # autocast dtype, defaults to `float16` on cuda and `bfloat16` otherwise
+                 scaler=None # loss scaler, defaults to a new `GradScaler` for `float16` on cuda
+                ): self.dtype, self._scaler = dtype, scaler
+
+    def before_fit(self, learn):
+        self.device_type = next(learn.model.parameters()).device.type
+        # bfloat16 doesn't need loss scaling, float16 does (only supported on cuda)
+        self.dt = self.dtype or (torch.float16 if self.device_type=='cuda' else torch.bfloat16)
+        self.scaler = self._scaler or (torch.cuda.amp.GradScaler() if self.dt==torch.float16 and self.device_type=='cuda' else None)
+        self.autocast, self.unscaled = None, True
+
+    def before_batch(self, learn):
+        self.autocast = torch.autocast(self.device_type, dtype=self.dt)
+        self.autocast.__enter__()
+
+    def _exit(self):
+        if self.autocast is not None: self.autocast.__exit__(None, None, None)
+        self.autocast = None
+
+    def after_loss(self, learn):
+        # backward runs outside of autocast
+        self._exit()
+        if self.scaler is not None and learn.training:
+            self.loss = learn.loss
+            learn.loss = self.scaler.scale(learn.loss)
+            # grads kept from the previous step (`MomentumLearner` momentum) were unscaled by `before_step`:
+            # scale them like the loss, so that `unscale_` doesn't divide them by the scale again on every step
+            if self.unscaled and getattr(learn, 'grad_mom', False):
+                gs = [p.grad for p in learn.model.parameters() if p.grad is not None]
+                if gs: torch._foreach_mul_(gs, self.scaler.get_scale())
+            self.unscaled = False
+
+    def after_backward(self, learn):
+        # the next micro-batch (if any) needs autocast again, `before_step` turns it off
+        self.before_batch(learn)
+        if self.scaler is not None: learn.loss = self.loss
+
+    def before_step(self, learn):
+        self._exit()
+        if self.scaler is None: return
+        # unscale grads in place, so that `step` (and gradient clipping etc.) work with real values
+        self.scaler.unscale_(learn.opt)
+        self.unscaled = True
+        if sum(v.item() for v in self.scaler._found_inf_per_device(learn.opt).values()):
+            # skip this step: reduce the scale and drop the inf/nan grads
+            self.scaler.update()
+            learn.opt.zero_grad()
+            raise CancelBatchException()
+
+    def after_step(self, learn):
+        if self.scaler is not None: self.scaler.update()
+
+    # make sure we never leave autocast on (e.g. if a batch was cancelled before `after_loss`)
+    def cleanup_batch(self, learn): self._exit()
+
+# %% ../nbs/09_learner.ipynb 131
+class _FirstCall(nn.Module):
+    "Calls `cb.cmodel` on the first batch of shape `key`, and switches that shape to eager mode if it fails"
+    def __init__(self, cb, key):
+        super().__init__()
+        self.cmodel, self.cb, self.key = cb.cmodel, cb, key
+        self.training = cb.model.training
+    def forward(self, *args, **kwargs):
+        try: return self.cmodel(*args, **kwargs)
+        except Exception as e: self.cb._fail(self.key, e)
+        return self.cb.model(*args, **kwargs)
+
+class CompileCB(Callback):
+    # run after `DeviceCB`, `MixedPrecisionCB` and any callbacks that add hooks in `before_fit`
+    order = MixedPrecisionCB.order + 10
+    def __init__(self, 
+                 compile_loss=False, # also compile `learn.loss_func`
+                 max_shapes=4, # max number of (shape, training) combinations to compile for
+                 **kwargs # passed to `torch.compile` (e.g. `mode`, `dynamic`)
+                ):
+        self.compile_loss, self.max_shapes, self.kwargs = compile_loss, max_shapes, kwargs
+        self.model = self.cmodel = None
+
+    def _compile(self, f):
+        try: return torch.compile(f, **self.kwargs)
+        except Exception as e: warnings.warn(f'torch.compile is not available, using eager mode: {e}')
+
+    def _fail(self, key, e):
+        # compile errors only show up on the first call, so this shape runs eagerly from now on
+        warnings.warn(f'Compiled model failed for {key}, using eager mode for it: {e}')
+        self.shapes.pop(key, None)
+        self.failed.add(key)
+
+    def _first_loss(self, key):
+        def _f(*args, **kwargs):
+            if key not in self.failed:
+                try: return self.closs(*args, **kwargs)
+                except Exception as e: self._fail(key, e)
+            return self.loss_func(*args, **kwargs)
+        return _f
+
+    def before_fit(self, learn):
+        # `shapes` maps each compiled (shape, training) to whether its first batch ran without errors
+        self.loss_func, self.closs, self.shapes, self.failed = learn.loss_func, None, {}, set()
+        if any(m._forward_hooks or m._forward_pre_hooks or m._backward_hooks for m in learn.model.modules()):
+            warnings.warn('Model has hooks which compiled graphs would ignore, using eager mode')
+            self.model = self.cmodel = None
+            return
+        # keep compiled model between fits, so that we don't compile again (e.g. after `SingleBatchCB`)
+        if self.model is not learn.model: self.model, self.cmodel = learn.model, self._compile(learn.model)
+        if self.compile_loss and self.cmodel is not None: self.closs = self._compile(learn.loss_func)
+
+    def before_batch(self, learn):
+        self.key = None
+        if self.cmodel is None: return
+        key = (tuple(learn.batch[0].shape), learn.training)
+        if key in self.failed: return
+        if key not in self.shapes and len(self.shapes) < self.max_shapes: self.shapes[key] = False
+        if key not in self.shapes: return
+        # compiled module has its own `training` flag (its children are the same as the model's)
+        self.cmodel.training = self.model.training
+        self.key, first = key, not self.shapes[key]
+        learn.model = _FirstCall(self, key) if first else self.cmodel
+        if self.closs is not None: learn.loss_func = self._first_loss(key) if first else self.closs
+
+    def after_loss(self, learn):
+        if self.key in self.shapes: self.shapes[self.key] = True
+
+    def cleanup_batch(self, learn):
+        if self.model is not None: learn.model = self.model
+        learn.loss_func = self.loss_func
+
+    def cleanup_fit(self, learn): self.cleanup_batch(learn)
+
+# %% ../nbs/09_learner.ipynb 136
+class TraceCB(Callback):
+    # run before other callbacks, so that their `before_fit` already sees the tracer
+    order = -10
+    def __init__(self,
+                 batches=range(10), # batches to keep in the Chrome trace
+                 path=None, # save the Chrome trace json to `path` after fit
+                 sync=False # synchronize cuda before taking each time, so that spans include their kernels
+                ):
+        fc.store_attr()
+        self.batches = set(batches)
+
+    def now(self):
+        if self.sync and torch.cuda.is_available(): torch.cuda.synchronize()
+        return time.perf_counter_ns()
+
+    def record(self, name, cat, start):
+        # store the duration of a span, and the span itself if we are in one of `batches`
+        end = self.now()
+        self.times[name].append(end-start)
+        if self.n in self.batches or name in ('fit', 'epoch'): self.events.append((name, cat, start, end-start))
+        if name == 'batch': self.n += 1
+
+    def wrap(self, f, name, cat):
+        def _f(*args, **kwargs):
+            start = self.now()
+            try: return f(*args, **kwargs)
+            finally: self.record(name, cat, start)
+        return _f
+
+    def wrap_event(self, nm, ms):
+        # a dispatch table entry that times the event and each of its callback methods
+        if not ms: return ms
+        names = [f'{type(m.__self__).__name__}.{nm}' for m in ms]
+        def _run(learn):
+            start = self.now()
+            try:
+                for m,name in zip(ms, names):
+                    t = self.now()
+                    try: m(learn)
+                    finally: self.record(name, 'callback', t)
+            finally: self.record(nm, 'event', start)
+        return [_run]
+
+    def iter_dl(self, dl):
+        # time every `next` on the dataloader
+        it = iter(dl)
+        while True:
+            start = self.now()
+            try: b = next(it)
+            except StopIteration: return
+            self.record('data', 'event', start)
+            yield b
+
+    def before_fit(self, learn):
+        self.times, self.events, self.n, self.t0 = defaultdict(list), [], 0, self.now()
+        learn.tracer = self
+        # rebuild the dispatch table, so that all entries get wrapped
+        learn._cb_tbl = {}
+        # `TrainLearner` implements the steps as methods, so override them on the instance for the duration of fit
+        self.steps = [nm for nm in ('predict', 'get_loss', 'backward', 'step', 'zero_grad') if hasattr(type(learn), nm)]
+        for nm in self.steps: learn.__dict__[nm] = self.wrap(getattr(learn, nm), nm, 'step')
+
+    def cleanup_fit(self, learn):
+        for nm in self.steps: learn.__dict__.pop(nm, None)
+        learn.tracer = None
+        learn._cb_tbl = {}
+        # `with_cbs` had no tracer when the fit started, so the root `fit` span is closed here, before saving it
+        self.record('fit', 'event', self.t0)
+        if self.path is not None: self.save(self.path)
+
+    def stats(self):
+        "count, mean, p50 and p99 (in ms) of every event, callback and step, slowest total first"
+        res = {}
+        for k,v in self.times.items():
+            t = torch.tensor(v, dtype=torch.float64)/1e6
+            res[k] = dict(n=len(v), total=t.sum().item(), mean=t.mean().item(),
+                          p50=t.quantile(0.5).item(), p99=t.quantile(0.99).item())
+        return dict(sorted(res.items(), key=lambda o: -o[1]['total']))
+
+    def show(self):
+        res = '|Name|Count|Total ms|Mean ms|p50 ms|p99 ms|\n|--|--|--|--|--|--|\n'
+        for k,d in self.stats().items():
+            res += f"|{k}|{d['n']}|{d['total']:.1f}|{d['mean']:.3f}|{d['p50']:.3f}|{d['p99']:.3f}|\n"
+        if fc.IN_NOTEBOOK:
+            from IPython.display import Markdown
+            return Markdown(res)
+        else: print(res)
+
+    def save(self, path):
+        "save the kept spans in Chrome trace format"
+        evs = [dict(name=name, cat=cat, ph='X', ts=(start-self.t0)/1e3, dur=dur/1e3, pid=0, tid=0)
+               for name,cat,start,dur in self.events]
+        Path(path).write_text(json.dumps(dict(traceEvents=evs)))
+
+# %% ../nbs/09_learner.ipynb 141
+class _ShardSampler(torch.utils.data.Sampler):
+    "every `world`-th index starting at `rank`, without padding"
+    def __init__(self, n, rank, world): self.n, self.rank, self.world = n, rank, world
+    def __iter__(self): return iter(range(self.rank, self.n, self.world))
+    def __len__(self): return len(range(self.rank, self.n, self.world))
+
+class _StrideLoader:
+    "every `world`-th batch of `dl` starting at `rank`; with `even` all ranks get the same number of batches"
+    def __init__(self, dl, rank, world, even): fc.store_attr()
+    def __len__(self): return len(self.dl)//self.world if self.even else len(range(self.rank, len(self.dl), self.world))
+    def __iter__(self): return itertools.islice(self.dl, self.rank, self.world*len(self) if self.even else None, self.world)
+
+def _shard(dl, rank, world, train):
+    if not isinstance(dl, DataLoader): return _StrideLoader(dl, rank, world, even=train)
+    # training shards need the same length on every rank, otherwise the grad all-reduce would hang
+    sampler = (DistributedSampler(dl.dataset, world, rank, shuffle=True, drop_last=dl.drop_last) if train
+               else _ShardSampler(len(dl.dataset), rank, world))
+    return DataLoader(dl.dataset, dl.batch_size, sampler=sampler, collate_fn=dl.collate_fn, num_workers=dl.num_workers,
+                      pin_memory=dl.pin_memory, drop_last=dl.drop_last)
+
+class DDPCB(Callback):
+    # before any other callback, so that they see the sharded data
+    order = -20
+    def before_fit(self, learn):
+        self.rank, self.world = dist.get_rank(), dist.get_world_size()
+        self.model, self.dls = learn.model, (learn.dls.train, learn.dls.valid)
+        learn.model = DistributedDataParallel(learn.model)
+        learn.dls.train, learn.dls.valid = (_shard(dl, self.rank, self.world, t) for dl,t in zip(self.dls, (True, False)))
+        for cb in learn.cbs:
+            if isinstance(cb, MetricsCB): cb.sync = sync_and_compute
+
+    def before_epoch(self, learn):
+        # a different shuffle every epoch (the same on all ranks)
+        s = getattr(learn.dl, 'sampler', None)
+        if isinstance(s, DistributedSampler): s.set_epoch(learn.epoch)
+
+    def cleanup_fit(self, learn):
+        learn.model = self.model
+        learn.dls.train, learn.dls.valid = self.dls
+        for cb in learn.cbs:
+            if isinstance(cb, MetricsCB): cb.sync = None
+
+def _quiet(learn):
+    "Remove `ProgressCB` from `learn` and stop `MetricsCB` from logging"
+    learn.cbs = [cb for cb in learn.cbs if not isinstance(cb, ProgressCB)]
+    for cb in learn.cbs:
+        if isinstance(cb, MetricsCB): cb._log = fc.noop
+
+def _ddp_worker(learn, rank, world, port, q, n_threads, kwargs):
+    os.environ.update(MASTER_ADDR='127.0.0.1', MASTER_PORT=str(port))
+    torch.set_num_threads(n_threads)
+    dist.init_process_group('gloo', rank=rank, world_size=world)
+    try:
+        # only rank 0 shows progress and logs
+        if rank: _quiet(learn)
+        start = time.perf_counter()
+        learn.fit(cbs=DDPCB(), **kwargs)
+        if rank == 0:
+            # send the weights serialized, as shared memory tensors would go away with the process
+            buf = io.BytesIO()
+            torch.save(learn.model.state_dict(), buf)
+            q.put((buf.getvalue(), time.perf_counter()-start))
+    finally: dist.destroy_process_group()
 
-# %% ../nbs/09_learner.ipynb 103
 @fc.patch
-def lr_find(self: Learner, gamma=1.3, max_mult=3, start_lr=1e-5, max_epochs=10):
-    self.fit(max_epochs, lr=start_lr, cbs=LRFinderCB(gamma=gamma, max_mult=max_mult))
+def fit_ddp(self:Learner, n_epochs=1,
+            n_procs=2, # number of processes
+            port=29500, # port for the processes to rendezvous on
+            **kwargs # passed to `fit`
+           ):
+    "`fit` with distributed data parallel over `n_procs` forked cpu processes. Returns the time taken by rank 0"
+    ctx = mp.get_context('fork')
+    q = ctx.SimpleQueue()
+    n_threads = max(1, torch.get_num_threads()//n_procs)
+    ps = [ctx.Process(target=_ddp_worker, args=(self, r, n_procs, port, q, n_threads, dict(n_epochs=n_epochs, **kwargs)))
+          for r in range(n_procs)]
+    for p in ps: p.start()
+    # rank 0 sends its weights before exiting, so wait for them (or for all processes to end) before joining
+    while q.empty() and any(p.is_alive() for p in ps): time.sleep(0.05)
+    res = None if q.empty() else q.get()
+    for p in ps: p.join()
+    if res is None or any(p.exitcode for p in ps): raise RuntimeError(f'fit_ddp failed: exit codes {[p.exitcode for p in ps]}')
+    self.model.load_state_dict(torch.load(io.BytesIO(res[0])))
+    return res[1]
+
+# %% ../nbs/09_learner.ipynb 148
+def share_dls(dls):
+    "Move the in-memory tensors of `dls` (from `TensorDataset`s or `TensorLoader`s) to shared memory"
+    for dl in (dls.train, dls.valid):
+        ts = getattr(dl, 'ts', None) or getattr(getattr(dl, 'dataset', None), 'tensors', ())
+        for t in ts:
+            if t.device.type == 'cpu' and not t.is_shared(): t.share_memory_()
+    return dls
+
+def sample_space(space, n=None, seed=None):
+    "All combinations of the values in `space`, or `n` random ones. Values can also be functions of a `random.Random`"
+    if not isinstance(space, Mapping): return list(space)
+    if n is None: return [dict(zip(space, o)) for o in itertools.product(*space.values())]
+    rng = random.Random(seed)
+    return [{k: v(rng) if callable(v) else rng.choice(v) for k,v in space.items()} for _ in range(n)]
+
+# %% ../nbs/09_learner.ipynb 149
+class ASHACB(Callback):
+    # after `MetricsCB` has logged the epoch
+    order = MetricsCB.order + 1
+    def __init__(self,
+                 metric='loss', # name of the `MetricsCB` metric to compare trials on
+                 mode='min', # `min` or `max`
+                 eta=3, # keep the best `1/eta` of the trials at each rung
+                 min_epochs=1, # epochs before the first rung
+                 rungs=None, # dict from rung epoch to the metrics recorded there, shared by the trials (None to never stop)
+                 lock=None # lock for `rungs`
+                ):
+        fc.store_attr()
+        self.hist, self.last, self.pruned = [], {}, False
+
+    def before_fit(self, learn): self.hist, self.last, self.pruned = [], {}, False
+
+    def _stop(self, epoch, v):
+        # is `epoch` a rung?
+        r = epoch/self.min_epochs
+        if self.rungs is None or r < 1 or self.eta**round(math.log(r, self.eta)) != r: return False
+        with self.lock or nullcontext():
+            prev = self.rungs.get(epoch, [])
+            self.rungs[epoch] = prev + [v]
+        if not prev: return False
+        cut = torch.tensor(prev).quantile(1/self.eta if self.mode == 'min' else 1-1/self.eta).item()
+        return v > cut if self.mode == 'min' else v < cut
+
+    def after_epoch(self, learn):
+        # rungs are per epoch, so intra-epoch validations on a subset (see `ValidateCB`) don't count
+        if learn.training or learn.intra_val: return
+        self.last = {k: v.compute().item() for k,v in learn.metrics.all_metrics.items()}
+        v = self.last[self.metric]
+        self.hist.append(v)
+        # the last epoch is still recorded at its rung, but there's nothing left to save by stopping
+        if self._stop(learn.epoch+1, v) and learn.epoch+1 < learn.n_epochs:
+            self.pruned = True
+            raise CancelFitException()
+
+# %% ../nbs/09_learner.ipynb 150
+class SweepResults:
+    "Results of `run_sweep`, one row per trial, best first"
+    def __init__(self, rows, metric='loss', mode='min'):
+        fc.store_attr('metric,mode')
+        # failed trials go last
+        def key(r): v = r.get(self.metric); return (v is None, 0 if v is None else v if mode=='min' else -v)
+        self.rows = sorted(rows, key=key)
+
+    def best(self): return self.rows[0]
+
+    def table(self):
+        cols = list(dict.fromkeys(k for r in self.rows for k in r if k != 'error'))
+        def fmt(v): return f'{v:.4g}' if isinstance(v, float) else getattr(v, '__name__', str(v))
+        res = '|' + '|'.join(cols) + '|\n|' + '--|'*len(cols) + '\n'
+        for r in self.rows: res += '|' + '|'.join(fmt(r.get(k, '')) for k in cols) + '|\n'
+        return res
+
+    def _repr_markdown_(self): return self.table()
+    def __repr__(self): return self.table()
+    def __len__(self): return len(self.rows)
+    def __getitem__(self, i): return self.rows[i]
+
+# %% ../nbs/09_learner.ipynb 151
+def _sweep_trial(a):
+    # runs in a forked process, with `_sweep_state` set by the parent before forking
+    i, cfg = a
+    factory, n_epochs, seed, kw = _sweep_state
+    if seed is not None: torch.manual_seed(seed+i)
+    res, start = dict(trial=i, **cfg), time.perf_counter()
+    cb = ASHACB(**kw)
+    try:
+        learn = factory(**cfg)
+        _quiet(learn)
+        learn.fit(n_epochs, cbs=cb)
+        res.update(status='pruned' if cb.pruned else 'done', epochs=len(cb.hist), **cb.last)
+    except Exception as e: res.update(status='failed', epochs=len(cb.hist), error=repr(e))
+    res['secs'] = time.perf_counter()-start
+    return res
+
+def _sweep_init(n_threads): torch.set_num_threads(n_threads)
+
+def run_sweep(factory, # function from a config to a `Learner`
+              space, # list of configs, or dict of lists of values (see `sample_space`)
+              n_epochs=1,
+              n=None, # number of random configs to sample from `space` (default: all combinations)
+              n_procs=None, # number of processes (default: one per cpu)
+              metric='loss', # name of the `MetricsCB` metric to compare trials on
+              mode='min', # `min` or `max`
+              prune=True, # stop bad trials early with `ASHACB`
+              eta=3, # keep the best `1/eta` of the trials at each rung
+              min_epochs=1, # epochs before the first rung
+              seed=None # seed of the sampling and of each trial (trial `i` gets `seed+i`)
+             ):
+    "Fit a learner from `factory` for each config of `space` in a pool of forked processes"
+    cfgs = sample_space(space, n, seed)
+    n_procs = min(n_procs or fc.defaults.cpus, len(cfgs))
+    n_threads = max(1, torch.get_num_threads()//n_procs)
+    global _sweep_state
+    ctx = mp.get_context('fork')
+    with ctx.Manager() as mgr:
+        kw = dict(metric=metric, mode=mode, eta=eta, min_epochs=min_epochs, rungs=mgr.dict() if prune else None, lock=mgr.Lock())
+        _sweep_state = factory, n_epochs, seed, kw
+        with ctx.Pool(n_procs, _sweep_init, (n_threads,)) as pool:
+            # results come back as trials finish
+            res = list(progress_bar(pool.imap_unordered(_sweep_trial, enumerate(cfgs)), total=len(cfgs)))
+    return SweepResults(res, metric, mode)
+
+# %% ../nbs/09_learner.ipynb 157
+def _targets(dl):
+    "targets of the items of `dl`, in order"
+    if hasattr(dl, 'ts'): return dl.ts[1]
+    if hasattr(getattr(dl, 'dataset', None), 'tensors'): return dl.dataset.tensors[1]
+    # otherwise we have to go through the data once
+    return torch.cat([to_cpu(b[1]) for b in dl])
+
+def stratified_idxs(y, n, seed=42):
+    "`n` random indices of `y`, with each class in the same proportion as in `y` (plain random ones for float targets)"
+    g = torch.Generator().manual_seed(seed)
+    perm = torch.randperm(len(y), generator=g)
+    if y.is_floating_point() or n >= len(y): return perm[:n].sort().values
+    # group the shuffled indices by class, and keep the first `k` of each class
+    order = perm[y[perm].argsort(stable=True)]
+    counts = y.unique(return_counts=True)[1]
+    k = (counts*n/len(y)).round().clamp(min=1).long()
+    rank = torch.arange(len(y)) - (counts.cumsum(0)-counts).repeat_interleave(counts)
+    return order[rank < k.repeat_interleave(counts)].sort().values
+
+def subset_dl(dl, idxs):
+    "`dl` over the items `idxs` of its data"
+    # a loader that a callback wrapped (e.g. `PipelineCB`) is subset underneath, and the subset is wrapped the same way
+    if hasattr(dl, 'rewrap'): return dl.rewrap(subset_dl(dl.dl, idxs))
+    if hasattr(dl, 'ts'): return type(dl)(TensorDataset(*(t[idxs] for t in dl.ts)), dl.bs)
+    return DataLoader(torch.utils.data.Subset(dl.dataset, idxs.tolist()), dl.batch_size, collate_fn=dl.collate_fn,
+                      num_workers=dl.num_workers, pin_memory=dl.pin_memory)
+
+# %% ../nbs/09_learner.ipynb 158
+class ValidateCB(Callback):
+    # after all the other callbacks are done with the training batch
+    order = ProgressCB.order+10
+    def __init__(self, 
+                 every=None, # validate every `every` training batches
+                 secs=None, # validate if more than `secs` seconds passed since the last validation
+                 n=None, # validate on a stratified random subset of `n` items (default: the whole validation set)
+                 seed=42 # seed of the subset
+                ): fc.store_attr()
+
+    def before_fit(self, learn):
+        dl = learn.dls.valid
+        self.dl = None if self.n is None else subset_dl(dl, stratified_idxs(_targets(dl), self.n, self.seed))
+        self.last = time.time()
+
+    def after_batch(self, learn):
+        if not learn.training: return
+        due = (self.every and (learn.iter+1) % self.every == 0) or (self.secs and time.time()-self.last >= self.secs)
+        # the last batch is followed by the full validation anyway
+        if due and (learn.n_iter is None or learn.iter+1 < learn.n_iter): self._validate(learn)
+
+    def _validate(self, learn):
+        # state of the training epoch that the validation would overwrite
+        state = {k: getattr(learn, k) for k in ('dl', 'iter', 'batch', 'preds', 'loss', 'n_iter')}
+        cbs, metrics = learn.cbs, getattr(learn, 'metrics', None)
+        learn.cbs = [cb for cb in cbs if not isinstance(cb, (ProgressCB, MetricsCB, ValidateCB))]
+        if metrics is not None:
+            vm = MetricsCB(**{k: deepcopy(v) for k,v in metrics.metrics.items()}, on_device=metrics.on_device)
+            vm.sync = metrics.sync
+            e, i = learn.epoch, learn.iter+1
+            vm._log = lambda d: metrics._log({**d, 'epoch': f'{e}:{i}'})
+            vm.before_fit(learn)
+            learn.cbs.append(vm)
+        learn._cb_tbl, learn.intra_val = {}, True
+        try: learn.validate(self.dl)
+        finally:
+            learn.cbs, learn._cb_tbl, learn.intra_val = cbs, {}, False
+            if metrics is not None: learn.metrics = metrics
+            for k,v in state.items(): setattr(learn, k, v)
+            learn.model.train()
+            self.last = time.time()
+
+class EarlyStoppingCB(Callback):
+    # after `MetricsCB` has logged the validation
+    order = MetricsCB.order+1
+    def __init__(self, 
+                 metric='loss', # name of the `MetricsCB` metric to check
+                 mode='min', # `min` or `max`
+                 patience=3, # number of validations without improvement before stopping
+                 min_delta=0., # minimum change that counts as an improvement
+                 restore_best=False # load the weights of the best validation at the end
+                ): fc.store_attr()
+
+    def before_fit(self, learn):
+        # intra-epoch validations on a subset (see `ValidateCB`) have their own best value and patience counter
+        self.bests, self.waits, self.best_state, self.stopped = {}, {False: 0, True: 0}, None, False
+
+    @property
+    def best(self): return self.bests.get(False) # best value of the full validations
+
+    def after_epoch(self, learn):
+        if learn.training: return
+        v, sub = learn.metrics.value(self.metric), learn.intra_val
+        best = self.bests.get(sub)
+        if best is None or (v < best-self.min_delta if self.mode == 'min' else v > best+self.min_delta):
+            self.bests[sub], self.waits[sub] = v, 0
+            # `restore_best` puts back the weights of the best full validation
+            if self.restore_best and not sub: self.best_state = {k: o.detach().clone() for k,o in learn.model.state_dict().items()}
+            return
+        self.waits[sub] += 1
+        if self.waits[sub] >= self.patience:
+            self.stopped = True
+            raise CancelFitException()
+
+    def cleanup_fit(self, learn):
+        if self.best_state is not None: learn.model.load_state_dict(self.best_state)
@@ -1,10 +1,16 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/12_accel_sgd.ipynb.
 
 # %% auto 0
-__all__ = ['BaseSchedCB', 'BatchSchedCB', 'HasLearnCB', 'RecorderCB', 'EpochSchedStep']
+__all__ = ['BaseSchedCB', 'BatchSchedCB', 'HasLearnCB', 'RecorderCB', 'EpochSchedStep', 'sched_lin', 'sched_cos', 'sched_exp',
+           'sched_const', 'combine_scheds', 'compile_scheds', 'one_cycle', 'plot_scheds', 'PrecomputedSched', 'SchedCB',
+           'CheckpointCB', 'FlatOptimizer', 'FlatSGD', 'FlatRMSProp', 'FlatAdamW']
 
 # %% ../nbs/12_accel_sgd.ipynb 2
-import torch
+import os,time,math,random,threading,queue,torch,numpy as np,matplotlib.pyplot as plt
+import fastcore.all as fc
+from pathlib import Path
+from collections import defaultdict
+from torch import optim
 
 from .datasets import *
 from .conv import *
@@ -23,7 +29,8 @@ class BaseSchedCB(Callback):
 
 # %% ../nbs/12_accel_sgd.ipynb 59
 class BatchSchedCB(BaseSchedCB):
-    def after_batch(self, learn): self._step(learn)
+    # step once per optimizer step (which is not every batch with gradient accumulation)
+    def after_step(self, learn): self._step(learn)
 
 # %% ../nbs/12_accel_sgd.ipynb 60
 class HasLearnCB(Callback):
@@ -31,27 +38,445 @@ class HasLearnCB(Callback):
     def after_fit(self, learn): self.learn = None
 
 # %% ../nbs/12_accel_sgd.ipynb 62
+def _downsample(x, y, n):
+    "`x` and `y` averaged over consecutive bins, so that there are at most `n` points"
+    if len(y) <= n: return x, y
+    idx = np.arange(0, len(y), math.ceil(len(y)/n))
+    cnt = np.diff(np.append(idx, len(y)))
+    return np.add.reduceat(x, idx)/cnt, np.add.reduceat(y, idx)/cnt
+
+def _pg_key(pg, k):
+    # `mom` is `momentum` in SGD-like optimizers and `betas` in Adam-like ones (as in `SchedCB`)
+    return ('betas' if 'betas' in pg else 'momentum') if k == 'mom' else k
+
+def _get_pg(pg, k):
+    "field `k` of param group `pg`, with `mom` and `beta2` resolved like in `SchedCB`, and the first of `betas`"
+    if k == 'beta2': return pg['betas'][1]
+    v = pg[_pg_key(pg, k)]
+    return v[0] if isinstance(v, (tuple, list)) else v
+
 class RecorderCB(Callback):
-    def __init__(self, **d): self.d = d
-    
+    # run after `MixedPrecisionCB`, so that grads are unscaled and steps it cancels (overflows) aren't recorded
+    order = MixedPrecisionCB.order + 1
+    _dev_keys = 'loss','grad_norm'
+    def __init__(self, 
+                 *keys, # param group fields, `loss`, `grad_norm` or `throughput`
+                 every=1, # record every `every` optimizer steps
+                 pg=0, # index of the param group to record fields of
+                 max_pts=1000, # max number of points per key in `plot`
+                 **d # functions of the callback to record
+                ):
+        self.keys, self.d, self.every, self.pg_idx, self.max_pts = keys, d, every, pg, max_pts
+
+    def _alloc(self, n, device=None):
+        return {k: torch.empty(n, device=device) if k in self._dev_keys else np.empty(n)
+                for k in ('step',)+self.keys+tuple(self.d)}
+
     def before_fit(self, learn):
-        # create a dict of names (of stuff to track) and function (to grab that stuff)
-        # the function will take a cb as input and index into cb.pg to grab what it needs
-        self.recs = {k:[] for k in self.d}
-        # grab the first parameter group to track
-        self.pg = learn.opt.param_groups[0]
-    
-    def after_batch(self, learn):
-        if not learn.training: return
-        for k,v in self.d.items():
-            self.recs[k].append(v(self))
-    
-    def plot(self):
-        for k,v in self.recs.items():
-            plt.plot(v, label=k)
-            plt.legend()
-            plt.show()
+        # grab the parameter group to track
+        self.pg = learn.opt.param_groups[self.pg_idx]
+        self.cols, self.n, self.step = None, 0, 0
+        self.items, self.last = 0, (0, time.perf_counter())
+
+    def _grow(self, device):
+        # allocate the columns on the first record, and double them whenever they are full
+        if self.cols is None: self.cols = self._alloc(256, device)
+        elif self.n == len(self.cols['step']):
+            new = self._alloc(2*self.n, device)
+            for k,v in self.cols.items(): new[k][:self.n] = v
+            self.cols = new
+
+    def before_batch(self, learn):
+        if learn.training: self.items += len(learn.batch[0])
+
+    # record once every `every` optimizer steps, right before the step, so that values are the ones the step uses
+    def before_step(self, learn):
+        self.step += 1
+        if (self.step-1) % self.every: return
+        self._grow(learn.loss.device)
+        c, i = self.cols, self.n
+        c['step'][i] = self.step-1
+        for k in self.keys:
+            if k == 'loss': c[k][i] = learn.loss.detach()
+            elif k == 'grad_norm':
+                gs = [p.grad for p in learn.model.parameters() if p.grad is not None]
+                c[k][i] = torch.stack(torch._foreach_norm(gs)).norm()
+            elif k == 'throughput':
+                t = time.perf_counter()
+                c[k][i] = (self.items-self.last[0])/(t-self.last[1])
+                self.last = self.items, t
+            else: c[k][i] = _get_pg(self.pg, k)
+        for k,f in self.d.items(): c[k][i] = f(self)
+        self.n += 1
+
+    @property
+    def steps(self): return np.empty(0) if self.cols is None else self.cols['step'][:self.n]
+
+    @property
+    def recs(self):
+        "recorded columns as numpy arrays (copied from the device once per call)"
+        if self.cols is None: return {k: np.empty(0) for k in self.keys+tuple(self.d)}
+        return {k: v[:self.n].cpu().numpy() if isinstance(v, torch.Tensor) else v[:self.n]
+                for k,v in self.cols.items() if k != 'step'}
+
+    def export(self, path):
+        "Write `step` and all the recorded columns to a `.csv`, `.parquet` or `.npz` file, depending on the suffix of `path`"
+        path = Path(path)
+        cols = {'step': self.steps, **self.recs}
+        if path.suffix == '.npz': np.savez(path, **cols)
+        elif path.suffix == '.csv':
+            np.savetxt(path, np.column_stack(list(cols.values())), delimiter=',', header=','.join(cols), comments='', fmt='%.8g')
+        elif path.suffix == '.parquet':
+            # pyarrow is only needed for parquet
+            import pyarrow as pa, pyarrow.parquet as pq
+            pq.write_table(pa.table(cols), path)
+        else: raise ValueError(f'Unknown format: {path.suffix}')
+        return path
+
+    def plot(self, max_pts=None):
+        recs = self.recs
+        _,axs = plt.subplots(1, len(recs), figsize=(4*len(recs), 3), squeeze=False)
+        for ax,(k,v) in zip(axs.flat, recs.items()):
+            ax.plot(*_downsample(self.steps, v, max_pts or self.max_pts))
+            ax.set_title(k)
 
 # %% ../nbs/12_accel_sgd.ipynb 70
 class EpochSchedStep(BaseSchedCB):
     def after_epoch(self, learn): self._step(learn)
+
+# %% ../nbs/12_accel_sgd.ipynb 86
+def sched_lin(start, end): return lambda pos: start + pos*(end-start)
+def sched_cos(start, end): return lambda pos: start + (1 + torch.cos(math.pi*(1-pos))) * (end-start)/2
+def sched_exp(start, end): return lambda pos: start * (end/start)**pos
+def sched_const(v): return lambda pos: torch.full_like(pos, v)
+
+def combine_scheds(pcts, scheds):
+    "Schedule running each of `scheds` for its fraction `pcts` of training"
+    edges = torch.tensor([0.]+list(pcts), dtype=torch.float64).cumsum(0)
+    def _inner(pos):
+        # which schedule each position falls in, and where it is inside that schedule
+        idx = torch.bucketize(pos, edges[1:-1], right=True)
+        res = torch.empty_like(pos)
+        for i,f in enumerate(scheds):
+            m = idx == i
+            if m.any(): res[m] = f((pos[m]-edges[i]) / (edges[i+1]-edges[i]))
+        return res
+    return _inner
+
+def compile_scheds(scheds, n):
+    "Values of each of `scheds` at each of `n` steps"
+    pos = torch.arange(n, dtype=torch.float64)/n
+    return {k: f(pos) for k,f in scheds.items()}
+
+def one_cycle(lr_max, pct_start=0.25, div=25., div_final=1e5, moms=(0.95, 0.85, 0.95)):
+    "1cycle schedules of `lr` and `mom`"
+    return dict(lr=combine_scheds([pct_start, 1-pct_start], [sched_cos(lr_max/div, lr_max), sched_cos(lr_max, lr_max/div_final)]),
+                mom=combine_scheds([pct_start, 1-pct_start], [sched_cos(*moms[:2]), sched_cos(*moms[1:])]))
+
+def plot_scheds(table):
+    _,axs = plt.subplots(1, len(table), figsize=(4*len(table), 3), squeeze=False)
+    for ax,(k,v) in zip(axs.flat, table.items()):
+        ax.plot(v)
+        ax.set_title(k)
+
+# %% ../nbs/12_accel_sgd.ipynb 87
+def _set_pg(pg, k, v):
+    k = _pg_key(pg, k)
+    if k == 'betas': pg[k] = (v, pg[k][1])
+    elif k == 'beta2': pg['betas'] = (pg['betas'][0], v)
+    else: pg[k] = v
+
+class PrecomputedSched:
+    "Scheduler setting param group fields from a `table` of precomputed values, one per step"
+    def __init__(self, opt, table, start=0):
+        self.opt, self.table, self.i = opt, table, start
+        # plain python floats per step, so that a step doesn't create any tensors
+        self.vals = torch.stack(list(table.values()), 1).tolist()
+        self._set()
+
+    def _set(self):
+        vs = self.vals[min(self.i, len(self.vals)-1)]
+        for pg in self.opt.param_groups:
+            for k,v in zip(self.table, vs): _set_pg(pg, k, v)
+
+    def step(self):
+        self.i += 1
+        self._set()
+
+    def state_dict(self): return dict(i=self.i)
+    def load_state_dict(self, sd):
+        self.i = sd['i']
+        self._set()
+
+class SchedCB(BatchSchedCB):
+    def __init__(self, 
+                 start=None, # step to start at (default: `learn.n_steps`)
+                 **scheds # functions of the position in training, for each param group field to schedule
+                ): self.scheds, self.start = scheds, start
+
+    def before_fit(self, learn):
+        n = math.ceil(len(learn.dls.train)/learn.accum) * learn.n_epochs
+        self.table = compile_scheds(self.scheds, n)
+        self.schedo = PrecomputedSched(learn.opt, self.table, learn.n_steps if self.start is None else self.start)
+
+    def plot(self): plot_scheds(self.table)
+
+# %% ../nbs/12_accel_sgd.ipynb 98
+def _rng_state():
+    return dict(torch=torch.get_rng_state(), random=random.getstate(), numpy=np.random.get_state(),
+                cuda=torch.cuda.get_rng_state_all() if torch.cuda.is_available() else None)
+
+def _set_rng_state(s):
+    torch.set_rng_state(s['torch'])
+    random.setstate(s['random'])
+    np.random.set_state(s['numpy'])
+    if s['cuda'] is not None and torch.cuda.is_available(): torch.cuda.set_rng_state_all(s['cuda'])
+
+def _cpu_copy(x):
+    "copy of `x` with all tensors cloned to the cpu"
+    if isinstance(x, torch.Tensor): return x.detach().to('cpu', copy=True)
+    if isinstance(x, dict): return {k:_cpu_copy(v) for k,v in x.items()}
+    if isinstance(x, (list, tuple)): return type(x)(_cpu_copy(o) for o in x)
+    return x
+
+class CheckpointCB(Callback):
+    # after schedulers and progress bars, so that `before_epoch` sees the RNG right before the dataloader uses it
+    order = ProgressCB.order+1
+    def __init__(self, 
+                 path='models/ckpt', # directory for the checkpoint files
+                 every=None, # save every `every` optimizer steps
+                 secs=None, # save if more than `secs` seconds passed since the last checkpoint
+                 keep=3, # number of checkpoints to keep
+                 resume=False # load the latest checkpoint in `path` and continue from it
+                ):
+        fc.store_attr()
+        self.path, self.th = Path(path), None
+
+    def _scheds(self, learn): return [cb for cb in learn.cbs if isinstance(cb, BaseSchedCB)]
+
+    def state(self, learn):
+        "everything we need to resume, copied to the cpu"
+        return _cpu_copy(dict(model=learn.model.state_dict(), opt=learn.opt.state_dict(),
+                              scheds=[cb.schedo.state_dict() for cb in self._scheds(learn)],
+                              epoch=learn.epoch, iter=learn.iter+1, n_steps=learn.n_steps,
+                              rng=_rng_state(), epoch_rng=self.epoch_rng))
+
+    def _save(self, st):
+        # write to a temporary file, fsync, then atomically rename it and remove old checkpoints.
+        # Files are numbered across fits, so that a new fit in the same `path` doesn't overwrite older checkpoints
+        fn = self.path/f"ckpt_{self.seq:06d}_{st['n_steps']:010d}.pt"
+        self.seq += 1
+        tmp = fn.with_suffix('.tmp')
+        with open(tmp, 'wb') as f:
+            torch.save(st, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, fn)
+        fs = self.files()
+        for o in fs[:max(len(fs)-self.keep, 0)]: o.unlink()
+
+    def _writer(self):
+        while (st := self.q.get()) is not None:
+            # keep the error for the training thread, which raises it on its next checkpoint
+            try: self._save(st)
+            except Exception as e: self.err = e
+
+    def files(self): return sorted(self.path.glob('ckpt_*.pt'))
+
+    def before_fit(self, learn):
+        self.path.mkdir(parents=True, exist_ok=True)
+        fs = self.files()
+        self.seq = int(fs[-1].stem.split('_')[1])+1 if fs else 0
+        self.q = queue.Queue(1)
+        self.th = threading.Thread(target=self._writer, daemon=True)
+        self.th.start()
+        self.last, self.loaded, self.start, self.set_rng, self.err = time.time(), False, None, None, None
+
+    def _load(self, learn):
+        fs = self.files()
+        if not fs: return
+        st = torch.load(fs[-1])
+        learn.model.load_state_dict(st['model'])
+        learn.opt.load_state_dict(st['opt'])
+        for cb,s in zip(self._scheds(learn), st['scheds']): cb.schedo.load_state_dict(s)
+        learn.n_steps = st['n_steps']
+        self.start = st
+
+    def before_epoch(self, learn):
+        if self.resume and not self.loaded: self._load(learn)
+        self.loaded = True
+        if learn.training: self.epoch_rng = _rng_state()
+        if self.start is None: return
+        # skip finished epochs, and the part of the interrupted epoch that was done
+        if learn.epoch < self.start['epoch']: raise CancelEpochException()
+        if learn.training:
+            _set_rng_state(self.start['epoch_rng'])
+            self.epoch_rng, learn.start_iter, self.set_rng = self.start['epoch_rng'], self.start['iter'], self.start['rng']
+            self.start = None
+
+    def before_batch(self, learn):
+        # put back the RNG state of the checkpoint, once the skipped batches are drawn
+        if self.set_rng is not None: _set_rng_state(self.set_rng)
+        self.set_rng = None
+
+    # a checkpoint at the last batch of an epoch leaves no batch to do it before the next epoch draws its order
+    def after_epoch(self, learn): self.before_batch(learn)
+
+    def after_batch(self, learn):
+        # only checkpoint right after an optimizer step, so that there are no partially accumulated grads
+        if self.err is not None: raise self.err
+        if not learn.training or not learn._do_step() or not self.q.empty(): return
+        if (self.every and learn.n_steps % self.every == 0) or (self.secs and time.time()-self.last >= self.secs):
+            self.q.put(self.state(learn))
+            self.last = time.time()
+
+    def cleanup_fit(self, learn):
+        # wait for the last checkpoint to be written (there's no writer if the fit was cancelled before our `before_fit`)
+        if self.th is None: return
+        self.q.put(None)
+        self.th.join()
+        self.th = None
+        if self.err is not None: raise self.err
+
+# %% ../nbs/12_accel_sgd.ipynb 105
+class FlatOptimizer(optim.Optimizer):
+    "Optimizer updating the params of each param group with `torch._foreach_*` ops, on a single flat buffer if `flat`"
+    def __init__(self, params, defaults, flat=True):
+        super().__init__(params, defaults)
+        self.flat, self.bufs = flat, None
+
+    def _bucket(self, pg, ps):
+        # copy params and grads into flat buffers, and make them views of these
+        sizes = [p.numel() for p in ps]
+        fp = torch.cat([p.detach().reshape(-1) for p in ps])
+        fg = torch.cat([p.grad.reshape(-1) for p in ps])
+        for p,v,g in zip(ps, fp.split(sizes), fg.split(sizes)): p.data, p.grad = v.view_as(p), g.view_as(p)
+        # the state of a bucket is kept with its first param, and reset if the bucket is not the same anymore
+        st = self.state[ps[0]]
+        if any(isinstance(v, torch.Tensor) and v.shape != fp.shape for v in st.values()): st.clear()
+        return dict(pg=pg, p=fp, g=fg, st=st, p0=ps[0])
+
+    def _build(self):
+        # `skipped`: params that could still get a grad later
+        self.bufs, self.skipped = [], []
+        for pg in self.param_groups:
+            ks = defaultdict(list)
+            for p in pg['params']:
+                if p.grad is not None: ks[p.device, p.dtype].append(p)
+                elif p.requires_grad: self.skipped.append(p)
+            self.bufs += [self._bucket(pg, ps) for ps in ks.values()]
+
+    def _stale(self):
+        # checked on every step, so it doesn't go through all the params: moving or converting the model, or setting
+        # its grads to `None`, replaces the params or grads of whole buckets, so their first param is enough
+        for b in self.bufs:
+            p = b['p0']
+            if p.data_ptr() != b['p'].data_ptr() or p.grad is None or p.grad.data_ptr() != b['g'].data_ptr(): return True
+        return any(p.grad is not None for p in self.skipped)
+
+    def _units(self):
+        "(param group, params, grads, states) to update together"
+        if not self.flat:
+            for pg in self.param_groups:
+                ps = [p for p in pg['params'] if p.grad is not None]
+                if ps: yield pg, ps, [p.grad for p in ps], [self.state[p] for p in ps]
+            return
+        if self.bufs is None or self._stale(): self._build()
+        for b in self.bufs: yield b['pg'], [b['p']], [b['g']], [b['st']]
+
+    @torch.no_grad()
+    def step(self, closure=None):
+        loss = None
+        if closure is not None:
+            with torch.enable_grad(): loss = closure()
+        for pg, ps, gs, sts in self._units():
+            for p,st in zip(ps, sts):
+                if not st: self.init_state(pg, st, p)
+            for st in sts: st['step'] += 1
+            self.update(pg, ps, gs, sts)
+        return loss
+
+    def zero_grad(self, set_to_none=True):
+        # flat grads must stay views of their buffer, so they are zeroed instead
+        if not self.flat or self.bufs is None: return super().zero_grad(set_to_none)
+        for b in self.bufs: b['g'].zero_()
+
+    def load_state_dict(self, state_dict):
+        super().load_state_dict(state_dict)
+        # the loaded state has to be checked against the buckets
+        self.bufs = None
+
+    def add_param_group(self, param_group):
+        super().add_param_group(param_group)
+        # the new params get their buckets on the next step
+        self.bufs = None
+
+    def init_state(self, pg, st, p): st['step'] = 0
+    def update(self, pg, ps, gs, sts): raise NotImplementedError
+
+# %% ../nbs/12_accel_sgd.ipynb 107
+def _decay(pg, ps):
+    # decoupled weight decay: p = p*(1-lr*wd)
+    if pg['weight_decay']: torch._foreach_mul_(ps, 1-pg['lr']*pg['weight_decay'])
+
+class FlatSGD(FlatOptimizer):
+    "SGD with momentum (`buf = momentum*buf + grad`) and decoupled weight decay"
+    def __init__(self, params, lr, momentum=0., weight_decay=0., flat=True):
+        super().__init__(params, dict(lr=lr, momentum=momentum, weight_decay=weight_decay), flat)
+
+    def init_state(self, pg, st, p):
+        super().init_state(pg, st, p)
+        if pg['momentum']: st['momentum_buffer'] = torch.zeros_like(p)
+
+    def update(self, pg, ps, gs, sts):
+        _decay(pg, ps)
+        if not pg['momentum']: return torch._foreach_add_(ps, gs, alpha=-pg['lr'])
+        bufs = [st['momentum_buffer'] for st in sts]
+        torch._foreach_mul_(bufs, pg['momentum'])
+        torch._foreach_add_(bufs, gs)
+        torch._foreach_add_(ps, bufs, alpha=-pg['lr'])
+
+class FlatRMSProp(FlatOptimizer):
+    "RMSProp (with optional momentum) and decoupled weight decay"
+    def __init__(self, params, lr, alpha=0.99, eps=1e-8, momentum=0., weight_decay=0., flat=True):
+        super().__init__(params, dict(lr=lr, alpha=alpha, eps=eps, momentum=momentum, weight_decay=weight_decay), flat)
+
+    def init_state(self, pg, st, p):
+        super().init_state(pg, st, p)
+        st['square_avg'] = torch.zeros_like(p)
+        if pg['momentum']: st['momentum_buffer'] = torch.zeros_like(p)
+
+    def update(self, pg, ps, gs, sts):
+        _decay(pg, ps)
+        sqrs = [st['square_avg'] for st in sts]
+        torch._foreach_mul_(sqrs, pg['alpha'])
+        torch._foreach_addcmul_(sqrs, gs, gs, value=1-pg['alpha'])
+        denom = torch._foreach_sqrt(sqrs)
+        torch._foreach_add_(denom, pg['eps'])
+        if not pg['momentum']: return torch._foreach_addcdiv_(ps, gs, denom, value=-pg['lr'])
+        bufs = [st['momentum_buffer'] for st in sts]
+        torch._foreach_mul_(bufs, pg['momentum'])
+        torch._foreach_addcdiv_(bufs, gs, denom)
+        torch._foreach_add_(ps, bufs, alpha=-pg['lr'])
+
+class FlatAdamW(FlatOptimizer):
+    "Adam with decoupled weight decay"
+    def __init__(self, params, lr, betas=(0.9, 0.999), eps=1e-8, weight_decay=1e-2, flat=True):
+        super().__init__(params, dict(lr=lr, betas=betas, eps=eps, weight_decay=weight_decay), flat)
+
+    def init_state(self, pg, st, p):
+        super().init_state(pg, st, p)
+        st['exp_avg'], st['exp_avg_sq'] = torch.zeros_like(p), torch.zeros_like(p)
+
+    def update(self, pg, ps, gs, sts):
+        (b1,b2),n = pg['betas'], sts[0]['step']
+        _decay(pg, ps)
+        avgs, sqrs = [st['exp_avg'] for st in sts], [st['exp_avg_sq'] for st in sts]
+        torch._foreach_lerp_(avgs, gs, 1-b1)
+        torch._foreach_mul_(sqrs, b2)
+        torch._foreach_addcmul_(sqrs, gs, gs, value=1-b2)
+        # unbias both averages: p -= lr/(1-b1**n) * avg / (sqrt(sqr_avg/(1-b2**n)) + eps)
+        denom = torch._foreach_sqrt(sqrs)
+        torch._foreach_div_(denom, math.sqrt(1-b2**n))
+        torch._foreach_add_(denom, pg['eps'])
+        torch._foreach_addcdiv_(ps, avgs, denom, value=-pg['lr']/(1-b1**n))
@@ -1,7 +1,7 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/04_minibatch_training.ipynb.
 
 # %% auto 0
-__all__ = ['accuracy', 'report', 'Dataset', 'fit', 'get_dls']
+__all__ = ['accuracy', 'report', 'Dataset', 'fit', 'TensorLoader', 'get_dls']
 
 # %% ../nbs/04_minibatch_training.ipynb 1
 import pickle,gzip,math,os,shutil,torch,matplotlib as mpl, numpy as np, matplotlib.pyplot as plt
@@ -47,6 +47,30 @@ def fit(epochs, model, loss_func, opt, train_dl, valid_dl):
         print(epoch, tot_loss/count, tot_acc/count)
     return tot_loss/count, tot_acc/count
 
-# %% ../nbs/04_minibatch_training.ipynb 198
-def get_dls(train_ds, valid_ds, bs, **kwargs):
+# %% ../nbs/04_minibatch_training.ipynb 199
+def _tensors(ds): return ds.tensors if hasattr(ds, 'tensors') else (ds.x, ds.y)
+
+class TensorLoader:
+    def __init__(self, 
+                 ds, # `Dataset` or `TensorDataset` with all the data in memory
+                 bs, # batch size
+                 shuffle=False, # draw a new permutation of indices every epoch
+                 drop_last=False # drop last incomplete batch
+                ):
+        self.ts, self.bs, self.shuffle, self.drop_last = _tensors(ds), bs, shuffle, drop_last
+        self.n = len(self.ts[0])
+        
+    def __len__(self): return self.n//self.bs if self.drop_last else math.ceil(self.n/self.bs)
+    
+    def __iter__(self):
+        idxs = torch.randperm(self.n, device=self.ts[0].device) if self.shuffle else None
+        for i in range(0, len(self)*self.bs, self.bs):
+            # slices are views (no copy); shuffled batches need a single gather per tensor
+            s = slice(i, i+self.bs) if idxs is None else idxs[i:i+self.bs]
+            yield tuple(t[s] for t in self.ts)
+
+# %% ../nbs/04_minibatch_training.ipynb 201
+def get_dls(train_ds, valid_ds, bs, fast=False, **kwargs):
+    # `fast` uses `TensorLoader` for datasets that are already in memory (`kwargs` can only be `drop_last`)
+    if fast: return (TensorLoader(train_ds, bs, shuffle=True, **kwargs), TensorLoader(valid_ds, bs*2, **kwargs))
     return (DataLoader(train_ds, bs, shuffle=True, **kwargs), DataLoader(valid_ds, bs*2, **kwargs))